@@ -0,0 +1,32 @@
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction import FeatureHasher
+
+
+def bow_matrix(sent_list, columns, dtype=np.float64):
+    """Returns the bag of words matrix of a list of sentences (lists of word forms) as a sparse CSR
+    matrix, with the count of each word form in columns (a dictionary from word form to column
+    number) in its column. Word forms that are not in columns are left out. Only the words of the
+    sentences are stored, so the memory needed grows with the number of words rather than with
+    the number of sentences times the size of the vocabulary"""
+    rows = []
+    cols = []
+    for n, sentence in enumerate(sent_list):
+        for word in sentence:
+            i = columns.get(word)
+            if i is not None:
+                rows.append(n)
+                cols.append(i)
+    counts = np.ones(len(rows), dtype=dtype)
+    # Converting from coordinates adds up the counts of a word form appearing more than once in a sentence
+    return sparse.coo_matrix((counts, (rows, cols)), shape=(len(sent_list), len(columns))).tocsr()
+
+
+def hashed_bow_matrix(sent_list, buckets, leave_out=()):
+    """Returns the bag of words matrix of a list of sentences with a fixed number of columns
+    (the hashing trick), as a sparse CSR matrix. Each word form is counted in the column its hash
+    falls in, added or subtracted depending on the sign of the hash, so word forms sharing a column
+    tend to cancel out rather than add up. No vocabulary is needed, the sentences are read once and
+    the matrix has the same columns for every pair. Word forms in leave_out are not counted"""
+    hasher = FeatureHasher(n_features=buckets, input_type='string', alternate_sign=True)
+    return hasher.transform([word for word in sentence if word not in leave_out] for sentence in sent_list)
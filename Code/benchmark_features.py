@@ -0,0 +1,230 @@
+import argparse
+import random
+import re
+import time
+import numpy as np
+import decisiontree_grammatical
+import decisiontree_bagofwords
+from decisiontree_grammatical import right_left_context
+
+# The versions of the feature matrix steps that matched the regular expressions of each example
+# and stacked dense rows one at a time, kept here to compare against
+
+
+def feature_extraction(sent, target_word):
+    """Outputs a feature vector for the target word"""
+    target_vector = np.zeros(16)
+    LC, RC, LC2 = right_left_context(sent, target_word) 
+    nominal_left = re.search(r'^[n|l|f|g|t]', LC[1]) # Words with grammatical case, such as nouns and pronouns
+    nominal_right = re.search(r'^[n|l|f|g|t]', RC[1])
+    finite_left = re.search(r'^[sb|sf|sv]', LC[1]) # A verb that inflects for person agreement
+    finite_right = re.search(r'^[sb|sf|sv]', RC[1])
+    nominative_left = re.search(r'^[nn|ln|fn|gn|tn]', LC[1]) 
+    nominative_right = re.search(r'^[nn|ln|fn|gn|tn]', RC[1])
+    oblique_left = re.search(r'^[no|lo|fo|go|to|nþ|lþ|fþ|gþ|tþ|ne|le|fe|ge|te]', LC[1]) # Has some grammatical case other than nominative
+    oblique_right = re.search(r'^[no|lo|fo|go|to|nþ|lþ|fþ|gþ|tþ|ne|le|fe|ge|te]', RC[1])
+    particle_left = re.search(r'^[a|c]', LC[1])
+    particle_right = re.search(r'^[a|c]', RC[1])
+    feminine_two_left = re.search(r'^[fpv|nv]', LC2[1])
+    masculine_two_left = re.search(r'^[fpk|nk]', LC2[1])
+    infinitive_particle_left = re.search(r'^[cn]', LC[1]) 
+    infinitive_particle_right = re.search(r'^[cn]', RC[1])
+    infinitive_verb_left = re.search(r'^[sn]', LC[1])
+    infinitive_verb_right = re.search(r'^[sn]', RC[1])
+    if nominal_left:
+        target_vector[0] = 1
+    else:
+        target_vector[0] = 0
+    if nominal_right:
+        target_vector[1] = 1
+    else:
+        target_vector[1] = 0
+    if finite_left:
+        target_vector[2] = 1
+    else:
+        target_vector[2] = 0
+    if finite_right:
+        target_vector[3] = 1
+    else:
+        target_vector[3] = 0
+    if nominative_left:
+        target_vector[4] = 1
+    else:
+        target_vector[4] = 0
+    if nominative_right:
+        target_vector[5] = 1
+    else:
+        target_vector[5] = 0
+    if oblique_left:
+        target_vector[6] = 1
+    else:
+        target_vector[6] = 0
+    if oblique_right:
+        target_vector[7] = 1
+    else:
+        target_vector[7] = 0
+    if particle_left:
+        target_vector[8] = 1
+    else:
+        target_vector[8] = 0
+    if particle_right:
+        target_vector[9] = 1
+    else:
+        target_vector[9] = 0
+    if feminine_two_left:
+        target_vector[10] = 1
+    else:
+        target_vector[10] = 0
+    if masculine_two_left:
+        target_vector[11] = 1
+    else:
+        target_vector[11] = 0
+    if infinitive_particle_left:
+        target_vector[12] = 1
+    else:
+        target_vector[12] = 0
+    if infinitive_particle_right:
+        target_vector[13] = 1
+    else:
+        target_vector[13] = 0
+    if infinitive_verb_left:
+        target_vector[14] = 1
+    else:
+        target_vector[14] = 0
+    if infinitive_verb_right:
+        target_vector[15] = 1
+    else:
+        target_vector[15] = 0
+    
+    return target_vector
+
+
+def feature_matrix_vstack(sent_list, target_word):
+    data_matrix = np.zeros([1,16])
+    for i in sent_list:
+        target_vector = feature_extraction(i, target_word)
+        data_matrix = np.vstack((data_matrix, target_vector))
+    return data_matrix
+
+
+def generate_bow_vstack(vocab, sent_list, target_word_1, target_word_2):
+    unique_vocab = {}
+    for i in vocab:
+        if i != target_word_1:
+            if i != target_word_2:
+                if i in unique_vocab:
+                    unique_vocab[i] += 1
+                else:
+                    unique_vocab[i] = 1
+
+    vocab_list = []
+    for key, value in unique_vocab.items():
+        vocab_list.append(key)
+
+    data_matrix = np.zeros(len(vocab_list))
+    for sentence in sent_list:
+        bow_vector = np.zeros(len(vocab_list))
+        for word in sentence:
+            for i, w in enumerate(vocab_list):
+                if word == w:
+                    bow_vector[i] += 1
+        data_matrix = np.vstack((data_matrix, bow_vector))
+    data_matrix = np.delete(data_matrix, 0,0)
+    return data_matrix, vocab_list
+
+
+def make_examples(n, target_word, vocab, tags, rng):
+    """Returns n random sentence examples of the target word, as (word form, tag) tuples"""
+    examples = []
+    for _ in range(n):
+        sent = [(rng.choice(vocab), rng.choice(tags)) for _ in range(rng.randint(5, 25))]
+        sent.insert(rng.randrange(len(sent) + 1), (target_word, rng.choice(tags)))
+        examples.append(sent)
+    return examples
+
+
+def timed(function, *arguments):
+    """Returns the result of a function call and the seconds it took"""
+    start = time.perf_counter()
+    result = function(*arguments)
+    return result, time.perf_counter() - start
+
+
+def grammatical_new(sent_list_1, sent_list_2):
+    """Builds the grammatical feature matrix of the first candidate with the current version"""
+    return decisiontree_grammatical.feature_matrix([(None, sent) for sent in sent_list_1], 'leyti')
+
+
+def bag_of_words_new(sent_list_1, sent_list_2):
+    """Builds the bag of words matrix of both candidates with the current version"""
+    vocab_words, total_sent_list = decisiontree_bagofwords.remove_postag(sent_list_1, sent_list_2)
+    return decisiontree_bagofwords.generate_bow(vocab_words, total_sent_list, 'leyti', 'leiti')
+
+
+def same_bow(old, new):
+    """Checks that the old and the current bag of words matrices are the same"""
+    return np.array_equal(old[0], new[0].toarray())
+
+
+def grammatical_old(sent_list_1, sent_list_2):
+    """Builds the grammatical feature matrix of the first candidate with the old version"""
+    return feature_matrix_vstack(sent_list_1, 'leyti')
+
+
+def bag_of_words_old(sent_list_1, sent_list_2):
+    """Builds the bag of words matrix of both candidates with the old version"""
+    vocab_words, total_sent_list = decisiontree_bagofwords.remove_postag(sent_list_1, sent_list_2)
+    return generate_bow_vstack(vocab_words, total_sent_list, 'leyti', 'leiti')
+
+
+def growth(function, limit):
+    """Times function on limit // 2 and limit examples of each candidate and returns b and c of
+    b * n + c * n ** 2 through both timings, as stacking the rows one at a time makes the old
+    versions grow with the square of the examples"""
+    n1, n2 = limit // 2, limit
+    t1 = timed(function, make_examples(n1, 'leyti', vocab, tags, rng), make_examples(n1, 'leiti', vocab, tags, rng))[1]
+    t2 = timed(function, make_examples(n2, 'leyti', vocab, tags, rng), make_examples(n2, 'leiti', vocab, tags, rng))[1]
+    c = max((t2 / n2 - t1 / n1) / (n2 - n1), 0)
+    return t2 / n2 - c * n2, c
+
+
+parser = argparse.ArgumentParser(description="Times building the feature matrices of the classifier scripts with the old versions and the current ones")
+parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help="Numbers of examples of each candidate to time")
+parser.add_argument('--vocab', type=int, default=2000, help="Number of different word forms in the examples")
+parser.add_argument('--old-limit', type=int, default=10000, help="Largest number of grammatical examples the old version is timed on, as its time grows with the square of the examples. Above it the time is estimated")
+parser.add_argument('--old-bow-limit', type=int, default=1000, help="Largest number of bag of words examples the old version is timed on. Above it the time is estimated")
+parser.add_argument('--seed', type=int, default=0)
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+vocab = ['w{}'.format(i) for i in range(args.vocab)]
+tags = ['nken', 'nveo', 'lkfnsf', 'fpken', 'sfg3en', 'sng', 'ao', 'cn', 'c', 'ta', 'punctuation']
+
+# Above the limits the old versions would take hours, so their time is estimated from two smaller runs
+estimates = {}
+if max(args.sizes) > args.old_limit:
+    estimates[grammatical_old] = growth(grammatical_old, args.old_limit)
+if max(args.sizes) > args.old_bow_limit:
+    estimates[bag_of_words_old] = growth(bag_of_words_old, args.old_bow_limit)
+
+print("{:>10}{:>22}{:>22}{:>22}{:>22}".format("examples", "grammatical old", "grammatical new", "bag of words old", "bag of words new"))
+for n in args.sizes:
+    sent_list_1 = make_examples(n, 'leyti', vocab, tags, rng)
+    sent_list_2 = make_examples(n, 'leiti', vocab, tags, rng)
+    times = []
+    for old_function, limit, new_function, compare in ((grammatical_old, args.old_limit, grammatical_new, np.array_equal),
+                                                      (bag_of_words_old, args.old_bow_limit, bag_of_words_new, same_bow)):
+        if n <= limit:
+            old, t = timed(old_function, sent_list_1, sent_list_2)
+            times.append("{:.3f}s".format(t))
+        else:
+            old = None
+            b, c = estimates[old_function]
+            times.append("~{:.0f}s".format(b * n + c * n ** 2))
+        new, t = timed(new_function, sent_list_1, sent_list_2)
+        times.append("{:.3f}s".format(t))
+        if old is not None:
+            assert compare(old, new)
+    print("{:>10}".format(n) + "".join("{:>22}".format(x) for x in times))
+if estimates:
+    print("~ estimated as b * n + c * n ** 2 from timings on half the limit and the limit (--old-limit, --old-bow-limit)")
@@ -0,0 +1,91 @@
+import argparse
+import csv
+import time
+import gen_wordlist
+from lexicon_index import LexiconIndex
+
+# The list based versions of the gen_wordlist steps, kept here to compare against
+
+
+def word_in_allfreq_lists(all_words):
+    actual_words = []
+    freqwords = []
+    with open('allfreq.tsv', encoding='utf8') as tsvfile:
+        reader = csv.reader(tsvfile, delimiter='\t')
+        for row in reader:
+            freqwords.append(row[0])
+    for word in all_words:
+        if word in freqwords:
+            actual_words.append(word)
+    return actual_words
+
+
+def check_if_real_word_lists(word_list, all_words):
+    real_words = []
+    for i in all_words:
+        if i in word_list:
+            real_words.append(i)
+    return real_words
+
+
+def check_things_lists(words, cand1words, candidate1, candidate2):
+    cslist = []
+    for i in words:
+        cslist.append(i)
+        newword = i.replace(candidate2, candidate1,1)
+        if newword in cand1words:
+            cslist.append(newword)
+    cs_list = []
+    for i in cslist:
+        if i not in cs_list:
+            cs_list.append(i)
+    cs_final = []
+    i = 0
+    while i <= (len(cs_list) - 2):
+        cand1 = cs_list[i]
+        if cs_list[i+1] == cand1.replace(candidate2, candidate1, 1):
+            cs_final.append(cs_list[i])
+            cs_final.append(cs_list[i+1])
+        i += 1
+    return cs_final
+
+
+def timed(function, *arguments):
+    """Returns the result of a function call and the seconds it took"""
+    start = time.perf_counter()
+    result = function(*arguments)
+    return result, time.perf_counter() - start
+
+
+def run(all_words, old):
+    """Runs the lexicon steps of gen_wordlist on a list of words and returns the time of each step"""
+    times = []
+    actual_words, t = timed(word_in_allfreq_lists if old else gen_wordlist.word_in_allfreq, all_words)
+    times.append(t)
+    cand1words = gen_wordlist.find_candidate1(set(actual_words), args.candidate1, LexiconIndex.build(list(dict.fromkeys(all_words))))
+    word_list = gen_wordlist.check_candidate2(cand1words, args.candidate1, args.candidate2)
+    real_words, t = timed(check_if_real_word_lists if old else gen_wordlist.check_if_real_word, word_list, all_words)
+    times.append(t)
+    cs_final, t = timed(check_things_lists if old else gen_wordlist.check_things, real_words, cand1words, args.candidate1, args.candidate2)
+    times.append(t)
+    return times
+
+
+parser = argparse.ArgumentParser(description="Times the lexicon steps of gen_wordlist.py with lists and with hashed sets")
+parser.add_argument('candidate1', help="Which letters does candidate 1 contain?")
+parser.add_argument('candidate2', help="Which letters does candidate 2 contain?")
+parser.add_argument('--lexicon', default='ordmyndalisti.txt', help="Word list from the DoMII")
+parser.add_argument('--sample', type=int, default=20000, help="Number of lexicon words the list based version is timed on, as it takes hours on the whole lexicon")
+args = parser.parse_args()
+
+with open(args.lexicon, encoding='utf-8') as MII_wordlist:
+    all_words = gen_wordlist.grab_MII_words(MII_wordlist)
+sample = all_words[:args.sample]
+
+steps = ["word_in_allfreq", "check_if_real_word", "check_things"]
+results = [("lists, {} words".format(len(sample)), run(sample, True)),
+           ("sets, {} words".format(len(sample)), run(sample, False)),
+           ("sets, {} words".format(len(all_words)), run(all_words, False))]
+print("{:<28}".format("") + "".join("{:>22}".format(x) for x in steps))
+for name, times in results:
+    print("{:<28}".format(name) + "".join("{:>21.3f}s".format(x) for x in times))
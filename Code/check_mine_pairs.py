@@ -0,0 +1,47 @@
+import argparse
+import collections
+import itertools
+import random
+from mine_pairs import substitution_pairs
+
+# Checks the grouped search of mine_pairs.py against comparing every pair of words
+
+
+def substitution_pairs_all(words):
+    """Returns the pairs of words that differ by a single substituted letter, by edit type,
+    comparing every pair of words of the same length"""
+    pairs = collections.defaultdict(set)
+    for word1, word2 in itertools.combinations(words, 2):
+        if len(word1) != len(word2):
+            continue
+        diff = [i for i in range(len(word1)) if word1[i] != word2[i]]
+        if len(diff) == 1:
+            i = diff[0]
+            a, b = sorted((word1, word2), key=lambda w: w[i])
+            pairs['{}/{}'.format(a[i], b[i])].add((a, b))
+    return pairs
+
+
+def check(words):
+    """Asserts that substitution_pairs finds the same pairs as comparing every pair of words"""
+    found = substitution_pairs(words)
+    expected = substitution_pairs_all(words)
+    for edit in set(found) | set(expected):
+        assert found[edit] == expected[edit], (edit, found[edit] ^ expected[edit])
+
+
+parser = argparse.ArgumentParser(description="Checks the single substitution pairs of mine_pairs.py against comparing every pair of words")
+parser.add_argument('--words', type=int, default=2000, help="Number of random words to check")
+parser.add_argument('--seed', type=int, default=0)
+args = parser.parse_args()
+
+# A group that is not in the order of the substituted letter, where the pair of the last two words was lost
+check(['bat', 'aat', 'cat'])
+assert ('bat', 'cat') in substitution_pairs(['bat', 'aat', 'cat'])['b/c']
+check(['þak', 'bak', 'lak', 'bað', 'lað', 'ak', 'baki'])
+
+rng = random.Random(args.seed)
+# The words are in random order, as they are in the lexicon, and unique, as mine_pairs.py gives them
+words = list(dict.fromkeys(''.join(rng.choice('abcdð') for _ in range(rng.randint(1, 4))) for _ in range(args.words)))
+check(words)
+print("substitution_pairs OK on {} words".format(len(words)))
@@ -0,0 +1,99 @@
+import argparse
+import csv
+import os
+import tempfile
+import freq_db
+import gen_spreads
+
+# The versions of the gen_spreads steps that read allfreq.tsv once for every word and scanned the
+# whole frequency list for every word form, kept here to check that the spreads are unchanged
+
+
+def collect_freqs(wordlist, freqs):
+    """Returns a list with each word form, lemma, tag and frequency
+    from the corpus total count"""
+    freqlist = []
+    for i in wordlist:
+        found = False
+        with open(freqs, encoding='utf8') as tsvfile: #allfreq contains all word frequencies from the IGC
+            reader = csv.reader(tsvfile, delimiter='\t')
+            for row in reader:
+                if row[0] == i: # grab the freqs of the appropriate words
+                    freqlist.append(row)
+                    found = True
+        if not found: # if the word does not exist in allfreq
+            freqlist.append([i, "0", "n/a", "0"])
+    return freqlist
+
+
+def createconfusionsets(result, freqlist):
+    """Returns a zipped list containing the word forms and total freqs, possible pos tags
+    and their freqs for each confusion set, as well as a zipped list with all possible
+    pos tags for each confusion set"""
+    total_count = [] # word forms of both candidates, total freq, possible pos and individual freqs
+    POS_set = [] # all pos tags of both candidates without additional information
+    for key, count in result.items():
+        word_count = []
+        POS_word = []
+        word_count.append(key)
+        word_count.append(count)
+        for i in freqlist:
+            if i[0] == key:
+                word_count.append(i[2])
+                POS_word.append(i[2])
+                word_count.append(int(i[3]))
+        total_count.append(word_count)
+        POS_set.append(POS_word)
+    zipped_POS = list(zip(POS_set[::2], POS_set[1::2]))
+    zipped_cs = list(zip(total_count[::2], total_count[1::2]))
+    return zipped_POS, zipped_cs
+
+
+def spread(wordlist, freqs, outputfile, old):
+    """Writes the spread of a wordlist with the old or the current steps and returns its bytes"""
+    with open(wordlist, encoding='utf8') as data_file:
+        total_words = gen_spreads.collect_words(data_file)
+    if old:
+        freqlist = collect_freqs(total_words, freqs)
+        POS, CS = createconfusionsets(gen_spreads.freqdict(freqlist), freqlist)
+    else:
+        POS, CS = gen_spreads.category_sets((wordlist, freqs))
+    gen_spreads.writeoutput(gen_spreads.identical_or_disjoint(POS, CS), CS, outputfile)
+    with open(outputfile, 'rb') as f:
+        return f.read()
+
+
+# A frequency list with a word form under several tags and a wordlist with repeated
+# word forms, a word form repeated within a pair and word forms missing from the list
+FREQS = [["leyti", "leyti", "nheo", "120"],
+         ["leiti", "leita", "sfg1en", "40"],
+         ["leyti", "leyti", "nheþ", "15"],
+         ["leiti", "leit", "nveþ", "9"],
+         ["hvort", "hvor", "fshen", "300"],
+         ["kvort", "kvort", "e", "1"],
+         ["leiti", "leiti", "nheo", "2"]]
+WORDS = ["leyti", "leiti", "hvort", "kvort", "leyti", "leiti", "hvort", "hvort", "ekkiorð", "leyti", "annaðekki", "hvort"]
+
+parser = argparse.ArgumentParser(description="Checks that gen_spreads.py writes the same spreads as the old steps, from allfreq.tsv and from the frequency database")
+parser.add_argument('--wordlist', help="Also check a wordlist from gen_wordlist.py")
+parser.add_argument('--freqs', default='allfreq.tsv', help="Frequency file the extra wordlist is checked against")
+args = parser.parse_args()
+
+with tempfile.TemporaryDirectory() as tmp:
+    freqs = os.path.join(tmp, 'allfreq.tsv')
+    with open(freqs, 'w', encoding='utf8') as f:
+        f.write('\n'.join('\t'.join(row) for row in FREQS))
+    db = os.path.join(tmp, 'allfreq.db')
+    freq_db.build_db(freqs, db)
+    wordlist = os.path.join(tmp, 'test_wordlist.txt')
+    with open(wordlist, 'w', encoding='utf8') as f:
+        f.write('\n'.join(WORDS) + '\n')
+    jobs = [(wordlist, freqs)]
+    if args.wordlist:
+        jobs.append((args.wordlist, args.freqs))
+    for wordlist, freqs in jobs:
+        old = spread(wordlist, freqs, os.path.join(tmp, 'old.csv'), True)
+        assert spread(wordlist, freqs, os.path.join(tmp, 'new.csv'), False) == old, wordlist
+        if freqs.endswith('.tsv') and wordlist.startswith(tmp):
+            assert spread(wordlist, db, os.path.join(tmp, 'db.csv'), False) == old, wordlist
+        print("{}: same spread ({} bytes)".format(os.path.basename(wordlist), len(old)))
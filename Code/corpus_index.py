@@ -0,0 +1,171 @@
+import argparse
+import os
+import tempfile
+import numpy as np
+from corpus_store import SentenceStore, map_array
+
+# The inverted index lives next to the arrays of a sentence store:
+#   index.bin          the postings of every word form, in word id order. A posting is the position
+#                      of a token in the flat token array; each list is sorted, delta coded and
+#                      written as variable length integers (7 bits per byte, high bit set on every
+#                      byte but the last one of a number)
+#   index_offsets.bin  where the postings of each word id start in index.bin, int64 (one more
+#                      entry than there are word forms)
+INDEX = 'index.bin'
+INDEX_OFFSETS = 'index_offsets.bin'
+
+
+def encode_varints(values):
+    """Returns the variable length byte encoding of an array of non-negative integers,
+    along with the number of bytes used for each of them"""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+    ends = np.cumsum(nbytes)
+    starts = ends - nbytes
+    data = np.zeros(int(ends[-1]) if len(values) else 0, dtype=np.uint8)
+    for k in range(int(nbytes.max()) if len(values) else 0):
+        mask = nbytes > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7f)
+        more = (nbytes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        data[starts[mask] + k] = byte | more
+    return data, nbytes
+
+
+def decode_varints(data):
+    """Returns the integers encoded by encode_varints"""
+    data = np.asarray(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80) + 1
+    starts = np.concatenate(([0], ends[:-1]))
+    owner = np.repeat(np.arange(len(ends)), ends - starts)
+    shifts = ((np.arange(len(data)) - starts[owner]) * 7).astype(np.uint64)
+    parts = (data & 0x7f).astype(np.uint64) << shifts
+    return np.add.reduceat(parts, starts)
+
+
+def word_ranges(counts, block):
+    """Splits the word ids into ranges of fewer than about 2 * block tokens each, with every word
+    form of block tokens or more in a range of its own. Range i is cuts[i] to cuts[i+1] (exclusive)"""
+    cuts = np.searchsorted(np.cumsum(counts), np.arange(block, int(counts.sum()), block), side='right')
+    heavy = np.flatnonzero(counts >= block)
+    return np.unique(np.concatenate(([0, len(counts)], cuts, heavy, heavy + 1)))
+
+
+def build_index(path, block=1 << 21):
+    """Builds the inverted index of the sentence store in path, a range of word ids at a time so that
+    no more than about block tokens are held in memory at once. A first pass over the token array
+    sorts the positions of the tokens into a temporary file for each range, in corpus order, and
+    each range is then grouped by word id, encoded and written in turn"""
+    store = SentenceStore(path)
+    tokens = store.tokens
+    counts = np.zeros(len(store.words), dtype=np.int64)
+    for low in range(0, len(tokens), block):
+        counts += np.bincount(tokens[low:low+block], minlength=len(counts))
+    cuts = word_ranges(counts, block)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    with tempfile.TemporaryDirectory(dir=path) as parts, open(os.path.join(path, INDEX + '.tmp'), 'wb') as index_file:
+        for low in range(0, len(tokens), block):
+            part = np.searchsorted(cuts, tokens[low:low+block], side='right') - 1
+            order = np.argsort(part, kind='stable').astype(np.int64) + low
+            sizes = np.bincount(part, minlength=len(cuts) - 1)
+            for i, positions in enumerate(np.split(order, np.cumsum(sizes)[:-1])):
+                if len(positions):
+                    with open(os.path.join(parts, str(i)), 'ab') as f:
+                        positions.tofile(f)
+        written = 0
+        for i in range(len(cuts) - 1):
+            first, last = int(cuts[i]), int(cuts[i+1])
+            name = os.path.join(parts, str(i))
+            if last - first == 1 and os.path.exists(name): # a single word form, read a block at a time
+                previous = 0
+                with open(name, 'rb') as f:
+                    while True:
+                        positions = np.fromfile(f, dtype=np.int64, count=block)
+                        if len(positions) == 0:
+                            break
+                        data, nbytes = encode_varints(np.diff(positions, prepend=previous))
+                        index_file.write(data.tobytes())
+                        written += len(data)
+                        previous = positions[-1]
+                offsets[last] = written
+            elif os.path.exists(name): # grouped by word id, in corpus order within each word
+                positions = np.fromfile(name, dtype=np.int64)
+                positions = positions[np.argsort(tokens[positions], kind='stable')]
+                deltas = np.diff(positions, prepend=0)
+                ends = np.cumsum(counts[first:last])
+                starts = (ends - counts[first:last])[counts[first:last] > 0]
+                deltas[starts] = positions[starts] # every postings list starts with an absolute position
+                data, nbytes = encode_varints(deltas)
+                index_file.write(data.tobytes())
+                byte_ends = np.zeros(len(nbytes) + 1, dtype=np.int64)
+                byte_ends[1:] = np.cumsum(nbytes)
+                offsets[first+1:last+1] = written + byte_ends[ends]
+                written += len(data)
+            else:
+                offsets[first+1:last+1] = written
+    del tokens, store
+    # written under temporary names first so a reader never sees half an index
+    with open(os.path.join(path, INDEX_OFFSETS + '.tmp'), 'wb') as f:
+        f.write(offsets.tobytes())
+    os.replace(os.path.join(path, INDEX + '.tmp'), os.path.join(path, INDEX))
+    os.replace(os.path.join(path, INDEX_OFFSETS + '.tmp'), os.path.join(path, INDEX_OFFSETS))
+
+
+def has_index(path):
+    """Checks if path is a sentence store with an inverted index"""
+    return os.path.exists(os.path.join(path, INDEX))
+
+
+class CorpusIndex:
+    """Looks up where word forms appear in a sentence store"""
+
+    def __init__(self, store):
+        if not isinstance(store, SentenceStore):
+            store = SentenceStore(store)
+        self.store = store
+        self.data = map_array(os.path.join(store.path, INDEX), np.uint8)
+        self.offsets = map_array(os.path.join(store.path, INDEX_OFFSETS), np.int64)
+
+    def postings(self, word):
+        """Returns the positions of every occurrence of a word form in the flat token array"""
+        word_id = self.store.word_ids.get(word)
+        if word_id is None:
+            return np.zeros(0, dtype=np.int64)
+        data = self.data[int(self.offsets[word_id]):int(self.offsets[word_id+1])]
+        return np.cumsum(decode_varints(data)).astype(np.int64)
+
+    def lookup(self, words):
+        """Returns a dictionary from each word form to a list of (sentence id, token position)
+        pairs, one for each time it appears in the corpus"""
+        result = {}
+        for word in words:
+            positions = self.postings(word)
+            sentences = np.searchsorted(self.store.offsets, positions, side='right') - 1
+            result[word] = list(zip(sentences.tolist(), (positions - self.store.offsets[sentences]).tolist()))
+        return result
+
+    def sentences(self, words):
+        """Returns a dictionary from each word form to the sorted ids of the sentences containing it.
+        As with `word in row` on the rows of all_sent.csv, a word also matches a tag with the same name"""
+        tag_ids = {t: i for i, t in enumerate(self.store.tags)}
+        result = {}
+        for word in words:
+            positions = self.postings(word)
+            if word in tag_ids:
+                tagged = np.flatnonzero(self.store.tagids == tag_ids[word])
+                positions = np.concatenate((positions, tagged))
+            sentences = np.searchsorted(self.store.offsets, positions, side='right') - 1
+            result[word] = np.unique(sentences)
+        return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Builds the inverted index of a sentence store")
+    parser.add_argument('store', help="Sentence store directory")
+    args = parser.parse_args()
+    build_index(args.store)
@@ -0,0 +1,257 @@
+import argparse
+import csv
+import os
+import shutil
+from array import array
+import numpy as np
+
+# A sentence store is a directory holding the whole corpus as integer codes:
+#   words.txt, tags.txt  the word form and tag vocabularies, one entry per line (the line number is the id)
+#   tokens.bin           the word id of every token in the corpus, int32
+#   tagids.bin           the tag id of every token in the corpus, uint16
+#   offsets.bin          where each sentence starts in the token arrays, int64 (one more entry than there are sentences)
+# The arrays are raw machine words so they can be memory mapped by numpy as they are
+WORDS = 'words.txt'
+TAGS = 'tags.txt'
+TOKENS = 'tokens.bin'
+TAGIDS = 'tagids.bin'
+OFFSETS = 'offsets.bin'
+token_type = np.int32
+tag_type = np.uint16
+offset_type = np.int64
+
+
+def read_vocab(path):
+    """Returns the entries of a vocabulary file as a list"""
+    with open(path, encoding='utf-8', newline='') as f:
+        return f.read().split('\n')[:-1]
+
+
+def map_array(path, dtype):
+    """Memory maps one of the arrays of a store read only"""
+    if os.path.getsize(path) == 0: # numpy refuses to map empty files
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class StoreWriter:
+    """Writes sentences to a store one at a time, interning word forms and tags as they arrive.
+    With append=True the sentences are added to the end of an existing store"""
+
+    def __init__(self, path, append=False):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.words = {}
+        self.tags = {}
+        if append:
+            for i in read_vocab(os.path.join(path, WORDS)):
+                self.words[i] = len(self.words)
+            for i in read_vocab(os.path.join(path, TAGS)):
+                self.tags[i] = len(self.tags)
+            offsets = map_array(os.path.join(path, OFFSETS), offset_type)
+            self.length = len(offsets) - 1
+            self.position = int(offsets[-1])
+            del offsets
+        mode = 'a' if append else 'w'
+        self.words_file = open(os.path.join(path, WORDS), mode, encoding='utf-8', newline='')
+        self.tags_file = open(os.path.join(path, TAGS), mode, encoding='utf-8', newline='')
+        self.tokens_file = open(os.path.join(path, TOKENS), mode + 'b')
+        self.tagids_file = open(os.path.join(path, TAGIDS), mode + 'b')
+        self.offsets_file = open(os.path.join(path, OFFSETS), mode + 'b')
+        self.token_buffer = array('i')
+        self.tag_buffer = array('H')
+        self.offset_buffer = array('q')
+        if not append:
+            self.length = 0
+            self.position = 0
+            self.offset_buffer.append(0)
+
+    def intern(self, entry, vocab, vocab_file):
+        """Returns the id of a word form or tag, adding it to the vocabulary if it is new"""
+        if entry is None:
+            entry = ''
+        if entry not in vocab:
+            entry = entry.replace('\n', ' ').replace('\r', ' ') # the vocabulary files have one entry per line
+            if entry in vocab:
+                return vocab[entry]
+            vocab[entry] = len(vocab)
+            vocab_file.write(entry + '\n')
+        return vocab[entry]
+
+    def add(self, sentence):
+        """Adds a sentence given as a list of alternating word forms and tags, like the rows of all_sent.csv"""
+        for p, k in zip(sentence[0::2], sentence[1::2]):
+            self.token_buffer.append(self.intern(p, self.words, self.words_file))
+            self.tag_buffer.append(self.intern(k, self.tags, self.tags_file))
+        self.position += len(sentence) // 2
+        self.length += 1
+        self.offset_buffer.append(self.position)
+        if len(self.token_buffer) > 1 << 20:
+            self.flush()
+
+    def remap(self, ids, names, vocab, vocab_file, dtype):
+        """Translates ids from another store's vocabulary to this one"""
+        unique, inverse = np.unique(ids, return_inverse=True)
+        new_ids = np.array([self.intern(names[i], vocab, vocab_file) for i in unique], dtype=dtype)
+        return new_ids[inverse]
+
+    def copy_sentences(self, store, start, end):
+        """Adds sentences start to end (exclusive) from another store without decoding them"""
+        self.flush()
+        low = int(store.offsets[start])
+        high = int(store.offsets[end])
+        tokens = self.remap(store.tokens[low:high], store.words, self.words, self.words_file, token_type)
+        tagids = self.remap(store.tagids[low:high], store.tags, self.tags, self.tags_file, tag_type)
+        offsets = np.asarray(store.offsets[start+1:end+1], dtype=offset_type) - low + self.position
+        self.tokens_file.write(tokens.tobytes())
+        self.tagids_file.write(tagids.tobytes())
+        self.offsets_file.write(offsets.tobytes())
+        self.position += high - low
+        self.length += end - start
+
+    def flush(self):
+        """Writes the buffered ids to disk"""
+        self.token_buffer.tofile(self.tokens_file)
+        self.tag_buffer.tofile(self.tagids_file)
+        self.offset_buffer.tofile(self.offsets_file)
+        self.token_buffer = array('i')
+        self.tag_buffer = array('H')
+        self.offset_buffer = array('q')
+
+    def close(self):
+        self.flush()
+        for f in (self.words_file, self.tags_file, self.tokens_file, self.tagids_file, self.offsets_file):
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def truncate_store(path, length):
+    """Drops every sentence of a store after the first length ones, along with the word forms and
+    tags that only those sentences used, such as the sentences appended by a run that did not finish.
+    Returns False, leaving the store as it is, if it holds fewer than length sentences"""
+    offsets = map_array(os.path.join(path, OFFSETS), offset_type)
+    if len(offsets) < length + 1:
+        return False
+    position = int(offsets[length])
+    # word forms and tags get their ids in the order they are first used, so the ones used by
+    # the sentences that are kept are exactly the ones below the largest id they use
+    sizes = []
+    for name, dtype in ((TOKENS, token_type), (TAGIDS, tag_type)):
+        ids = map_array(os.path.join(path, name), dtype)[:position]
+        sizes.append(int(ids.max()) + 1 if position else 0)
+        del ids
+    del offsets
+    os.truncate(os.path.join(path, TOKENS), position * np.dtype(token_type).itemsize)
+    os.truncate(os.path.join(path, TAGIDS), position * np.dtype(tag_type).itemsize)
+    os.truncate(os.path.join(path, OFFSETS), (length + 1) * np.dtype(offset_type).itemsize)
+    for name, size in zip((WORDS, TAGS), sizes):
+        entries = read_vocab(os.path.join(path, name))[:size]
+        os.truncate(os.path.join(path, name), sum(len(x.encode('utf-8')) + 1 for x in entries))
+    return True
+
+
+class SentenceStore:
+    """Read only view of a store. The id arrays are memory mapped, so opening a store is
+    cheap and the pages are shared between processes reading the same store"""
+
+    def __init__(self, path):
+        self.path = path
+        self.words = read_vocab(os.path.join(path, WORDS))
+        self.tags = read_vocab(os.path.join(path, TAGS))
+        self.tokens = map_array(os.path.join(path, TOKENS), token_type)
+        self.tagids = map_array(os.path.join(path, TAGIDS), tag_type)
+        self.offsets = map_array(os.path.join(path, OFFSETS), offset_type)
+        self._word_ids = None
+
+    @property
+    def word_ids(self):
+        """Dictionary from word form to word id, built on first use"""
+        if self._word_ids is None:
+            self._word_ids = {w: i for i, w in enumerate(self.words)}
+        return self._word_ids
+
+    def first_sentences(self, entries):
+        """Returns a dictionary from each of the entries that appear in the store to the first
+        sentence it appears in, either as a word form or as a tag (the same test as
+        `entry in row` on the rows of all_sent.csv)"""
+        first = {}
+        tag_ids = {t: i for i, t in enumerate(self.tags)}
+        for column, names, vocab in ((self.tokens, self.words, self.word_ids), (self.tagids, self.tags, tag_ids)):
+            wanted = set(vocab[e] for e in entries if e in vocab)
+            block = 1 << 26
+            for low in range(0, len(column), block):
+                if not wanted:
+                    break
+                ids = np.array(sorted(wanted), dtype=column.dtype)
+                chunk = column[low:low+block]
+                positions = np.flatnonzero(np.isin(chunk, ids))
+                found, index = np.unique(chunk[positions], return_index=True)
+                sentences = np.searchsorted(self.offsets, positions[index] + low, side='right') - 1
+                for i, n in zip(found.tolist(), sentences.tolist()):
+                    first[names[i]] = min(first.get(names[i], n), n)
+                    wanted.discard(i)
+        return first
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def sentence(self, i):
+        """Returns sentence i as a list of alternating word forms and tags"""
+        start = int(self.offsets[i])
+        end = int(self.offsets[i+1])
+        sentence = []
+        for p, k in zip(self.tokens[start:end].tolist(), self.tagids[start:end].tolist()):
+            sentence.append(self.words[p])
+            sentence.append(self.tags[k])
+        return sentence
+
+    def __iter__(self):
+        """Yields every sentence in order, decoding the arrays a block at a time"""
+        block = 100000
+        for first in range(0, len(self), block):
+            last = min(first + block, len(self))
+            offsets = self.offsets[first:last+1].tolist()
+            tokens = self.tokens[offsets[0]:offsets[-1]].tolist()
+            tagids = self.tagids[offsets[0]:offsets[-1]].tolist()
+            for start, end in zip(offsets, offsets[1:]):
+                sentence = []
+                for n in range(start - offsets[0], end - offsets[0]):
+                    sentence.append(self.words[tokens[n]])
+                    sentence.append(self.tags[tagids[n]])
+                yield sentence
+
+
+def read_csv_sentences(path):
+    """Yields the rows of a sentence file in the old CSV format"""
+    with open(path, "r", encoding="utf-8", newline='') as csv_file:
+        for row in csv.reader(csv_file):
+            yield row
+
+
+def open_sentences(path):
+    """Opens a sentence store, or an all_sent.csv file if the path is a CSV file.
+    Either way the result can be iterated over for lists of alternating word forms and tags"""
+    if path.endswith('.csv'):
+        return read_csv_sentences(path)
+    return SentenceStore(path)
+
+
+def convert_csv(csv_path, path):
+    """Builds a store from a sentence file in the old CSV format"""
+    shutil.rmtree(path, ignore_errors=True)
+    with StoreWriter(path) as writer:
+        for row in read_csv_sentences(csv_path):
+            writer.add(row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Converts all_sent.csv to a sentence store")
+    parser.add_argument('csvfile', help="Sentence file in the CSV format")
+    parser.add_argument('store', help="Directory the store is written to")
+    args = parser.parse_args()
+    convert_csv(args.csvfile, args.store)
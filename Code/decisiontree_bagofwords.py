@@ -7,46 +7,13 @@ import argparse
 import matplotlib.pyplot as plt
 import pydotplus
 import collections
+from example_store import open_examples
+from bag_of_words import bow_matrix, hashed_bow_matrix
 #import gensim
 #from gensim import corpora
 #from gensim import matutils
 
 
-def preprocess(file):
-    """Takes a txt file containing all sentence examples from the category as an input. 
-    Outputs a list of all sentences from the file """
-    data = file.read()
-    data = data.split(";;")
-    sent = []
-    for i in data:
-        i = i.split("punctuation")
-        for x in i:
-            x = x.split()
-            sent.append(x)
-    return sent
-
-
-def tuple_sent(sent):
-    """Takes each sentence and outputs each word and PoS tag as a tuple"""
-    tupled_sentences = []
-    for i in sent:
-        tupled_sentences.append(list(zip(i[::2], i[1::2])))
-    return tupled_sentences
-
-
-def sent_list(sent, target_word, n):
-    """Checks if the chosen word pair exists in each sentence. 
-    Outputs a list of sentences containing the words"""
-    sent_list = []
-    target_vector = []
-    for i in sent:
-        for x in i:
-            word = x[0]
-            if word == target_word:
-                sent_list.append(i)
-                target_vector.append(n)
-    return sent_list, target_vector
-
 def remove_postag(sent_list_1, sent_list_2):
     """Remove the pos tag"""
     vocab = []
@@ -86,15 +53,8 @@ def generate_bow(vocab, sent_list, target_word_1, target_word_2):
     for key, value in unique_vocab.items():
         vocab_list.append(key)
 
-    data_matrix = np.zeros(len(vocab_list))
-    for sentence in sent_list:
-        bow_vector = np.zeros(len(vocab_list))
-        for word in sentence:
-            for i, w in enumerate(vocab_list):
-                if word == w:
-                    bow_vector[i] += 1
-        data_matrix = np.vstack((data_matrix, bow_vector))
-    data_matrix = np.delete(data_matrix, 0,0)
+    columns = {w: i for i, w in enumerate(vocab_list)}
+    data_matrix = bow_matrix(sent_list, columns) # Sparse, the decision tree takes it as it is
     return data_matrix, vocab_list
 
 def automate(wordfile): # Makes it possible to calculate all word pairs of a certain category rather than running it over and over again by hand
@@ -107,6 +67,7 @@ def automate(wordfile): # Makes it possible to calculate all word pairs of a cer
     with open(args.wordfile, encoding='utf8') as wordfile:
         for word in wordfile:
             words.append(word.rstrip())
+    store = open_examples(args.filename, words) # Only the examples of the two words of a pair are read at a time. A text file of sentences is first sorted into a temporary example store
     count = 0
     while len(words) > count:
         target_word_1 = words[count]
@@ -114,15 +75,17 @@ def automate(wordfile): # Makes it possible to calculate all word pairs of a cer
         target_word_2 = words[count]
         count += 1
 
-        with open(args.filename, encoding='utf8') as data_file: # The datafile contains all sentence examples of the category in consideration
-            sent = preprocess(data_file)
-            sentences = tuple_sent(sent)
-            sent_list_1, target1 = sent_list(sentences, target_word_1, 0)
-            sent_list_2, target2 = sent_list(sentences, target_word_2, 1)
-            vocab, total_sent_list = remove_postag(sent_list_1, sent_list_2)
+        sent_list_1 = store.examples(target_word_1)
+        sent_list_2 = store.examples(target_word_2)
+        target1 = [0] * len(sent_list_1)
+        target2 = [1] * len(sent_list_2)
+        vocab, total_sent_list = remove_postag(sent_list_1, sent_list_2)
+        if args.hash_buckets:
+            data = hashed_bow_matrix(total_sent_list, args.hash_buckets, (target_word_1, target_word_2))
+        else:
             data, vocab_list = generate_bow(vocab, total_sent_list, target_word_1, target_word_2)
-            #data_matrix_2 = gensimthings(sent_list_2)
-            target = np.concatenate((target1,target2), axis=0)
+        #data_matrix_2 = gensimthings(sent_list_2)
+        target = np.concatenate((target1,target2), axis=0)
 
         clf = tree.DecisionTreeClassifier()
 
@@ -148,6 +111,7 @@ def automate(wordfile): # Makes it possible to calculate all word pairs of a cer
         precision.append(sumav2)
         recall.append(sumav3)
         fscore.append(sumav4)
+    store.close()
         
     print("Accuracy: ", accuracy)
     print("Precision: ", precision)
@@ -155,9 +119,11 @@ def automate(wordfile): # Makes it possible to calculate all word pairs of a cer
     print("F-score: " ,fscore)
     
 
-parser = argparse.ArgumentParser()
-parser.add_argument('filename') # This is a file containing sentence examples
-parser.add_argument('wordfile') # This is a file that contains a list of words meant to be analyzed
-args = parser.parse_args()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename') # This is a file containing sentence examples
+    parser.add_argument('wordfile') # This is a file that contains a list of words meant to be analyzed
+    parser.add_argument('--hash-buckets', type=int, help="Count the words in this many columns picked by a signed hash of each word (the hashing trick) instead of one column for each word of the vocabulary")
+    args = parser.parse_args()
 
-automate(args.wordfile)
+    automate(args.wordfile)
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import re
+import struct
+import tempfile
+import zlib
+
+# An example store holds the sentence examples of a category from gen_sentence_examples.py,
+# grouped by word form so the examples of a single word can be read without the rest:
+#   MAGIC
+#   a block for each word form of the category, holding its examples as the classifier scripts
+#   see them (each segment of the example file containing the word form, once for every time it
+#   appears there, or the context windows of a file written with --window). A block is the zlib
+#   compressed examples, one per line: the position of the word form in a context window (empty
+#   for a segment of a sentence) followed by the word forms and tags, separated by tabs
+#   a JSON index from each word form to the offset, length and number of examples of its block
+#   the offset of the index, as an unsigned 64 bit little endian integer
+MAGIC = b'ICSCEX3\n'
+INDEX_OFFSET = struct.Struct('<Q')
+# First line of an example file of context windows, followed by the window size
+WINDOW_HEADER = '@window\t'
+# An example file of sentences is split into segments on these, and each segment into word forms
+# and tags on whitespace. A segment containing a word form is an example of it for the classifiers
+SEPARATORS = re.compile('(;;|punctuation)')
+
+
+def is_example_store(path):
+    """Checks if a file is an example store rather than a text file from gen_sentence_examples.py"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def is_window_file(path):
+    """Checks if a text file from gen_sentence_examples.py holds context windows (--window)"""
+    with open(path, encoding='utf8') as f:
+        return f.read(len(WINDOW_HEADER)) == WINDOW_HEADER
+
+
+def read_examples(file, chunk_size=1 << 20):
+    """Yields (target word, [(word form, tag), ...]) for each segment of an example file of sentences,
+    reading the file a chunk at a time. The target word is the word form after the last ;; (the one
+    the examples were written for), None before the first one. As when the whole file is split on ;;
+    and punctuation at once, the tokens are paired in the order they come, so the first segment of a
+    word starts with (target word, first word form of its first example)"""
+    target = None
+    new_word = False
+    rest = ''
+    while True:
+        chunk = file.read(chunk_size)
+        pieces = SEPARATORS.split(rest + chunk)
+        if chunk:
+            rest = pieces.pop() # may end in the middle of a separator, so it waits for the next chunk
+        for n in range(0, len(pieces), 2):
+            x = pieces[n].split()
+            if new_word and x:
+                target = x[0] # each ;; is followed by the word form the examples belong to
+                new_word = False
+            yield target, list(zip(x[::2], x[1::2]))
+            if n + 1 < len(pieces) and pieces[n+1] == ';;':
+                new_word = True
+        if not chunk:
+            return
+
+
+def window_segment(position, window):
+    """Cuts a context window down to the punctuation tokens on either side of its word form, the
+    way an example file of sentences is split into segments. Returns the position of the word form
+    in the segment and the segment"""
+    start = position
+    while start > 0 and window[start-1][1] != 'punctuation':
+        start -= 1
+    end = position + 1
+    while end < len(window) and window[end][1] != 'punctuation':
+        end += 1
+    return position - start, window[start:end]
+
+
+def parse_windows(file):
+    """Returns a dictionary from each word form of an example file of context windows to its
+    examples, as the position of the word form in the window and a list of (word form, tag) tuples.
+    Each window is cut down to the segment of its sentence the word form is in"""
+    file.readline() # window size
+    examples = {}
+    for i in file.read().split(";;"):
+        lines = i.split('\n')
+        if not lines[0]:
+            continue
+        windows = []
+        for line in lines[1:]:
+            if line.startswith('@') and line[1:].isdigit():
+                windows.append((int(line[1:]), []))
+            elif line:
+                windows[-1][1].append(tuple(line.split('\t')))
+        examples.setdefault(lines[0], [window_segment(position, window) for position, window in windows])
+    return examples
+
+
+def example_line(position, segment):
+    """Returns an example as a line of a block, its position (empty if None) followed by the
+    word forms and tags"""
+    return '\t'.join(['' if position is None else str(position)] + [token for pair in segment for token in pair])
+
+
+class SpillBuffer:
+    """The example lines of each word form, kept in a temporary file for each word form and
+    held in memory until there are about buffer_size characters waiting to be written"""
+
+    def __init__(self, directory, buffer_size=1 << 24):
+        self.directory = directory
+        self.buffer_size = buffer_size
+        self.buffered = {}
+        self.size = 0
+
+    def path(self, n):
+        return os.path.join(self.directory, '{}.txt'.format(n))
+
+    def add(self, n, line):
+        """Adds a line to the examples of word form number n"""
+        self.buffered.setdefault(n, []).append(line)
+        self.size += len(line)
+        if self.size > self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered lines to the files of their word forms"""
+        for n, lines in self.buffered.items():
+            with open(self.path(n), 'a', encoding='utf-8', newline='') as f:
+                f.write(''.join(line + '\n' for line in lines))
+        self.buffered = {}
+        self.size = 0
+
+    def lines(self, n):
+        """Yields the lines of word form number n, once they have all been added and flushed"""
+        if os.path.exists(self.path(n)):
+            with open(self.path(n), encoding='utf-8', newline='') as f:
+                for line in f:
+                    yield line[:-1]
+
+
+def write_store(path, blocks):
+    """Writes an example store from (word form, example lines) pairs, compressing each block
+    as its lines are read"""
+    index = {}
+    with open(path + '.tmp', 'wb') as f:
+        f.write(MAGIC)
+        for word, lines in blocks:
+            offset = f.tell()
+            compressor = zlib.compressobj()
+            count = 0
+            for line in lines:
+                f.write(compressor.compress(((count and '\n' or '') + line).encode('utf-8')))
+                count += 1
+            f.write(compressor.flush())
+            index[word] = [offset, f.tell() - offset, count]
+        offset = f.tell()
+        f.write(json.dumps(index, ensure_ascii=False).encode('utf-8'))
+        f.write(INDEX_OFFSET.pack(offset))
+    os.replace(path + '.tmp', path)
+
+
+def build(textfile, path, words=()):
+    """Builds an example store from an example file made by gen_sentence_examples.py, with the
+    examples of the word forms the file was written for and of words. The examples of a file of
+    sentences are gathered in a temporary file for each word form as the file is read, so only
+    a part of them is held in memory at a time"""
+    if is_window_file(textfile):
+        with open(textfile, encoding='utf8') as f:
+            examples = parse_windows(f)
+        for word in words:
+            examples.setdefault(word, [])
+        write_store(path, ((word, (example_line(*x) for x in examples[word])) for word in examples))
+        return
+    with open(textfile, encoding='utf8') as f:
+        # the word forms are found in a first pass, so only their examples are kept in the second one
+        numbers = dict.fromkeys(target for target, segment in read_examples(f) if target is not None)
+        numbers.update(dict.fromkeys(words))
+        numbers = {word: n for n, word in enumerate(numbers)}
+        f.seek(0)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as directory:
+            spill = SpillBuffer(directory)
+            for target, segment in read_examples(f):
+                line = None
+                for x in segment: # once for every time a word form appears in the segment
+                    n = numbers.get(x[0])
+                    if n is not None:
+                        if line is None:
+                            line = example_line(None, segment)
+                        spill.add(n, line)
+            spill.flush()
+            write_store(path, ((word, spill.lines(n)) for word, n in numbers.items()))
+
+
+class ExampleStore:
+    """Reads the examples of single word forms from an example store. A temporary store
+    is removed when it is closed"""
+
+    def __init__(self, path, temporary=False):
+        self.temporary = temporary
+        self.file = open(path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError("Not an example store: " + path)
+        self.file.seek(-INDEX_OFFSET.size, os.SEEK_END)
+        end = self.file.tell()
+        offset, = INDEX_OFFSET.unpack(self.file.read(INDEX_OFFSET.size))
+        self.file.seek(offset)
+        self.index = json.loads(self.file.read(end - offset).decode('utf-8'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        if self.temporary:
+            os.remove(self.file.name)
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def count(self, word):
+        """Returns the number of examples of a word form"""
+        return self.index[word][2] if word in self.index else 0
+
+    def windows(self, word):
+        """Returns the examples of a word form, each the position of the word form in the example
+        (None for a segment of a sentence) and a list of (word form, tag) tuples"""
+        if word not in self.index:
+            return []
+        offset, length, count = self.index[word]
+        self.file.seek(offset)
+        lines = zlib.decompress(self.file.read(length)).decode('utf-8').split('\n')
+        examples = []
+        for line in lines[:count]:
+            x = line.split('\t')
+            examples.append((int(x[0]) if x[0] else None, list(zip(x[1::2], x[2::2]))))
+        return examples
+
+    def examples(self, word):
+        """Returns the examples of a word form, each a list of (word form, tag) tuples"""
+        return [example for position, example in self.windows(word)]
+
+
+class WindowFile:
+    """Reads the examples of single word forms from an example file of context windows"""
+
+    def __init__(self, path):
+        with open(path, encoding='utf8') as f:
+            self.index = parse_windows(f)
+
+    def close(self):
+        pass
+
+    def windows(self, word):
+        """Returns the examples of a word form, each the position of the word form in the window
+        and a list of (word form, tag) tuples, cut down to the segment the word form is in"""
+        return self.index.get(word, [])
+
+    def examples(self, word):
+        """Returns the context windows of a word form, each a list of (word form, tag) tuples"""
+        return [example for position, example in self.windows(word)]
+
+
+def open_examples(path, words=()):
+    """Returns an ExampleStore or a WindowFile for the examples in path. A text file of sentences
+    is built into a temporary example store first, with the examples of words as well as of the
+    word forms the file was written for, so the examples of one pair are read at a time"""
+    if is_example_store(path):
+        return ExampleStore(path)
+    if is_window_file(path):
+        return WindowFile(path)
+    f, storefile = tempfile.mkstemp(suffix='.exs')
+    os.close(f)
+    build(path, storefile, words)
+    return ExampleStore(storefile, temporary=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Builds an example store from the sentence examples of a category")
+    parser.add_argument('textfile', help="Sentence examples from gen_sentence_examples.py")
+    parser.add_argument('storefile', help="Example store to write")
+    args = parser.parse_args()
+    build(args.textfile, args.storefile)
@@ -0,0 +1,72 @@
+import argparse
+import csv
+import os
+import sqlite3
+
+# The frequency database holds the rows of allfreq.tsv in a single table, with indexes on the
+# word form, the lemma and the tag. The rank column keeps the order of allfreq.tsv (most
+# frequent first) so results come back in the same order as a scan through the file would give
+DB_FILE = 'allfreq.db'
+TSV_FILE = 'allfreq.tsv'
+
+
+def default_freqs():
+    """Returns the frequency database if it has been built, otherwise allfreq.tsv"""
+    if os.path.exists(DB_FILE):
+        return DB_FILE
+    return TSV_FILE
+
+
+def read_tsv(path):
+    """Yields the rows of a frequency file: word form, lemma, tag and count"""
+    with open(path, encoding='utf8') as tsvfile:
+        reader = csv.reader(tsvfile, delimiter='\t')
+        for row in reader:
+            yield row
+
+
+def build_db(tsv_path, db_path):
+    """Builds the frequency database from a frequency file"""
+    tmp_path = db_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE freqs (rank INTEGER PRIMARY KEY, form TEXT, lemma TEXT, tag TEXT, count INTEGER)")
+    conn.executemany("INSERT INTO freqs VALUES (?, ?, ?, ?, ?)",
+                     ((n, row[0], row[1], row[2], int(row[3])) for n, row in enumerate(read_tsv(tsv_path))))
+    for column in ('form', 'lemma', 'tag'): # indexes are built after the rows are in, which is much faster
+        conn.execute("CREATE INDEX freqs_{0} ON freqs ({0})".format(column))
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+
+def query(conn, column, values):
+    """Returns every row whose form, lemma or tag (given by column) is one of the values,
+    as lists of strings like the rows of allfreq.tsv, in the order of allfreq.tsv.
+    All the values are looked up with a single query"""
+    if column not in ('form', 'lemma', 'tag'):
+        raise ValueError("Unknown column: " + column)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (value TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM wanted")
+    conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((x,) for x in values))
+    rows = conn.execute("SELECT form, lemma, tag, count FROM freqs JOIN wanted ON freqs.{} = wanted.value "
+                        "ORDER BY rank".format(column))
+    return [[form, lemma, tag, str(count)] for form, lemma, tag, count in rows]
+
+
+def existing_forms(conn, forms):
+    """Returns the set of the given word forms that appear in the database"""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (value TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM wanted")
+    conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((x,) for x in forms))
+    rows = conn.execute("SELECT value FROM wanted WHERE EXISTS (SELECT 1 FROM freqs WHERE freqs.form = wanted.value)")
+    return set(x for (x,) in rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Builds the frequency database from allfreq.tsv")
+    parser.add_argument('tsvfile', nargs='?', default=TSV_FILE, help="Frequency file from gen_totalfreqs_totalsents")
+    parser.add_argument('dbfile', nargs='?', default=DB_FILE, help="Database file to write")
+    args = parser.parse_args()
+    build_db(args.tsvfile, args.dbfile)
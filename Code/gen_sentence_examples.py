@@ -1,5 +1,13 @@
 import csv
 import argparse
+import collections
+import os
+import random
+import shutil
+import tempfile
+from corpus_store import open_sentences, SentenceStore
+from corpus_index import CorpusIndex, has_index
+import example_store
 
 def clean_word_list(wordlist):
     """Returns a clean list of words from the txt inputfile, specified as
@@ -14,51 +22,270 @@ def clean_word_list(wordlist):
 def total_sentence_list(word_list):
     """Returns a list of all the sentences from the IGC"""
     sentence_list = []
-    with open("all_sent.csv", "r", encoding="utf-8") as csv_file:
-        csv_reader = csv.reader(csv_file)
-        for i in csv_reader:
-            sentence_list.append(i)
+    for i in open_sentences(args.sentences):
+        sentence_list.append(i)
     return sentence_list
 
 
-def word_in_sentence(sentence_list, word_list):
-    """Returns all sentence examples containing each word from the wordlist"""
+def target_tag(word, sent):
+    """Returns the pos tag of the first occurrence of a word in a sentence,
+    or None if it only matched a tag"""
+    for p,k in zip(sent[0::2], sent[1::2]):
+        if p == word:
+            return k
+    return None
+
+
+class ExampleSampler:
+    """Keeps a seeded random sample of at most max_examples sentence examples of each word,
+    using reservoir sampling so the sample is taken while the corpus is read once.
+    With stratify each pos tag of a word gets its own reservoir, and the sample is split
+    between the tags in proportion to how often the word appears with each of them"""
+
+    def __init__(self, max_examples, seed=0, stratify=False):
+        self.max_examples = max_examples
+        self.seed = seed
+        self.stratify = stratify
+        self.reservoirs = {} # word -> tag -> [examples seen, sampled (number, sentence) pairs, random generator]
+        self.chosen = {} # word -> the examples returned for it, so a word listed twice gets the same sample
+
+    def add(self, word, sent, n):
+        """Offers sentence number n as an example of word"""
+        tag = target_tag(word, sent) if self.stratify else None
+        strata = self.reservoirs.setdefault(word, {})
+        reservoir = strata.get(tag)
+        if reservoir is None:
+            reservoir = strata[tag] = [0, [], random.Random('{}:{}:{}'.format(self.seed, word, tag))]
+        seen, sample, rng = reservoir
+        if len(sample) < self.max_examples:
+            sample.append((n, sent))
+        else:
+            j = rng.randrange(seen + 1)
+            if j < self.max_examples:
+                sample[j] = (n, sent)
+        reservoir[0] += 1
+
+    def examples(self, word):
+        """Returns the sampled examples of a word in corpus order"""
+        if word in self.chosen:
+            return self.chosen[word]
+        strata = self.reservoirs.get(word, {})
+        tags = sorted(strata, key=str)
+        total = sum(strata[tag][0] for tag in tags)
+        if total <= self.max_examples:
+            quotas = [strata[tag][0] for tag in tags]
+        else: # largest remainder allocation of the sample between the tags
+            shares = [self.max_examples * strata[tag][0] / total for tag in tags]
+            quotas = [int(x) for x in shares]
+            by_remainder = sorted(range(len(tags)), key=lambda i: quotas[i] - shares[i])
+            for i in by_remainder[:self.max_examples - sum(quotas)]:
+                quotas[i] += 1
+        chosen = []
+        for tag, quota in zip(tags, quotas):
+            seen, sample, rng = strata[tag]
+            chosen.extend(sample if quota >= len(sample) else rng.sample(sample, quota))
+        self.chosen[word] = [sent for n, sent in sorted(chosen, key=lambda x: x[0])]
+        return self.chosen[word]
+
+
+def word_in_sentence(sentence_list, word_list, sampler=None):
+    """Returns all sentence examples containing each word from the wordlist.
+    The sentences are gone through once, each one going to every word of the list it contains"""
+    targets = set(word_list)
+    examples = {word: [] for word in targets}
+    for n, sent in enumerate(sentence_list):
+        for word in targets.intersection(sent):
+            if sampler is None:
+                examples[word].append(sent)
+            else:
+                sampler.add(word, sent, n)
     all_sentences = []
     for word in word_list:
         each_word_example = []
         each_word_example.append(word) # The words appear by themselves before the sentence examples
-        for sent in sentence_list:
-            if word in sent:
-                each_word_example.append(sent)
+        each_word_example.extend(examples[word] if sampler is None else sampler.examples(word))
         all_sentences.append(each_word_example)
     return all_sentences
 
 
+def index_examples(store, found, word, sampler=None):
+    """Returns the examples of a word from the ids of the sentences containing it.
+    A word is only offered to the sampler once, however many times it is listed"""
+    if sampler is None:
+        return [store.sentence(i) for i in found.tolist()]
+    if word not in sampler.reservoirs:
+        for i in found.tolist():
+            sampler.add(word, store.sentence(i), i)
+    return sampler.examples(word)
+
+
+def word_in_index(word_list, sampler=None):
+    """Returns all sentence examples containing each word from the wordlist,
+    looked up in the inverted index of the sentence store"""
+    store = SentenceStore(args.sentences)
+    found = CorpusIndex(store).sentences(set(word_list))
+    examples = {word: index_examples(store, found[word], word, sampler) for word in dict.fromkeys(word_list)} # each word is looked up once
+    all_sentences = []
+    for word in word_list:
+        each_word_example = []
+        each_word_example.append(word)
+        each_word_example.extend(examples[word])
+        all_sentences.append(each_word_example)
+    return all_sentences
+
+
+def write_sentence(f, x):
+    """Writes a single sentence example, one word and its pos tag per line"""
+    f.write('\n')
+    for p,k in zip(x[0::2], x[1::2]): # Zip a word and it's pos tags as a unit
+        if p.startswith(';;'): # Make sure no sentence actually starts with ;;
+            print("OH NOES")
+        else:
+            f.write(p)
+            f.write('\t') # The word and POS tag seperated by a tab
+            f.write(k)
+            f.write('\n')
+
+
+def write_example(f, word, x):
+    """Writes a sentence example of a word. With --window only the words around each occurrence
+    of the word are written, each window preceded by the position of the word in it"""
+    if args.window is None:
+        write_sentence(f, x)
+        return
+    for j in range(0, len(x) - 1, 2):
+        if x[j] == word:
+            start = max(0, j - 2 * args.window)
+            f.write('\n')
+            f.write('@{}'.format((j - start) // 2))
+            write_sentence(f, x[start:j + 2 * args.window + 2])
+
+
+def write_header(f):
+    """Marks a file of context windows with the window size"""
+    if args.window is not None:
+        f.write('@window\t{}\n'.format(args.window))
+
+
 def write_output(all_sentences):
     """Ouputs a txt file with the sentence examples"""
     with open(args.outputfile, "w", newline='', encoding="utf-8") as f:
+        write_header(f)
         for i in all_sentences:
             f.write(";;") # Two semicolons and the word in question used as barriers between sentence examples 
             f.write(i[0])
             f.write('\n')
             for x in i[1:]:
+                write_example(f, i[0], x)
+            f.write('\n')
+
+
+class SpillFiles:
+    """Append only files holding the examples of each word while the corpus is read.
+    Only the most recently used ones are kept open"""
+
+    def __init__(self, directory, max_open=256):
+        self.directory = directory
+        self.max_open = max_open
+        self.files = collections.OrderedDict()
+
+    def path(self, n):
+        return os.path.join(self.directory, '{}.txt'.format(n))
+
+    def get(self, n):
+        """Returns the open spill file of word number n"""
+        f = self.files.pop(n, None)
+        if f is None:
+            if len(self.files) >= self.max_open:
+                self.files.popitem(last=False)[1].close()
+            f = open(self.path(n), "a", newline='', encoding="utf-8")
+        self.files[n] = f
+        return f
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+
+
+def stream_sentences(sentences, word_list, outputfile, spill_dir=None, sampler=None):
+    """Writes all sentence examples containing each word from the wordlist without keeping them
+    in memory. Each sentence is read once and appended to the spill file of every word it contains,
+    and the spill files are joined into the output in the order of the wordlist at the end.
+    With a sampler only the sampled examples are kept, in memory instead of the spill files"""
+    targets = {word: n for n, word in enumerate(dict.fromkeys(word_list))}
+    with tempfile.TemporaryDirectory(dir=spill_dir) as directory:
+        spills = SpillFiles(directory)
+        for n, sent in enumerate(sentences):
+            for word in targets.keys() & sent:
+                if sampler is None:
+                    write_example(spills.get(targets[word]), word, sent)
+                else:
+                    sampler.add(word, sent, n)
+        spills.close()
+        with open(outputfile, "w", newline='', encoding="utf-8") as f:
+            write_header(f)
+            for word in word_list:
+                f.write(";;")
+                f.write(word)
                 f.write('\n')
-                for p,k in zip(x[0::2], x[1::2]): # Zip a word and it's pos tags as a unit
-                    if p.startswith(';;'): # Make sure no sentence actually starts with ;;
-                        print("OH NOES")
-                    else:
-                        f.write(p)
-                        f.write('\t') # The word and POS tag seperated by a tab
-                        f.write(k)
-                        f.write('\n')
+                path = spills.path(targets[word])
+                if sampler is not None:
+                    for x in sampler.examples(word):
+                        write_example(f, word, x)
+                elif os.path.exists(path):
+                    with open(path, newline='', encoding="utf-8") as spill:
+                        shutil.copyfileobj(spill, f)
+                f.write('\n')
+
+
+def stream_index(word_list, outputfile, sampler=None):
+    """Writes all sentence examples containing each word from the wordlist as they are
+    looked up in the inverted index, one word at a time"""
+    store = SentenceStore(args.sentences)
+    index = CorpusIndex(store)
+    with open(outputfile, "w", newline='', encoding="utf-8") as f:
+        write_header(f)
+        for word in word_list:
+            f.write(";;")
+            f.write(word)
+            f.write('\n')
+            if sampler is None:
+                for i in index.sentences([word])[word].tolist():
+                    write_example(f, word, store.sentence(i))
+            else:
+                for x in index_examples(store, index.sentences([word])[word], word, sampler):
+                    write_example(f, word, x)
             f.write('\n')
 
 parser = argparse.ArgumentParser()
 parser.add_argument('wordlist', help="Specify a text file with a list of word candidates")
 outputfile = parser.add_argument('outputfile', help="Specify a txt output file")
+parser.add_argument('--sentences', default='all_sent', help="Sentence store from gen_totalfreqs_totalsents (or a sentence file in the CSV format)")
+parser.add_argument('--stream', action='store_true', help="Write the examples as they are found instead of collecting them in memory first, for categories too large to fit in memory")
+parser.add_argument('--spill-dir', help="Where the examples of each word are kept until they are written in --stream mode (by default the system temporary directory)")
+parser.add_argument('--max-examples-per-word', type=int, help="Keep a random sample of at most this many examples of each word")
+parser.add_argument('--seed', type=int, default=0, help="Seed of the random sample, the same seed always gives the same sample")
+parser.add_argument('--stratify', action='store_true', help="Sample the examples of each pos tag of a word separately, in proportion to how often the word has that tag")
+parser.add_argument('--window', type=int, help="Only write the K words on each side of every occurrence of a word instead of the whole sentence, along with the position of the word")
+parser.add_argument('--example-store', help="Also write the examples to an example store (see example_store.py) in this file, for the classifier scripts to read the examples of single words from")
 args = parser.parse_args()
+sampler = None
+if args.max_examples_per_word is not None:
+    sampler = ExampleSampler(args.max_examples_per_word, args.seed, args.stratify)
 with open(args.wordlist, encoding='utf8') as wordlist:
     word_list = clean_word_list(wordlist)
-    sentence_list = total_sentence_list(word_list)
-    all_sentences = word_in_sentence(sentence_list, word_list)
-    write_output(all_sentences)
+    if args.stream:
+        if has_index(args.sentences):
+            stream_index(word_list, args.outputfile, sampler)
+        else:
+            stream_sentences(open_sentences(args.sentences), word_list, args.outputfile, args.spill_dir, sampler)
+    else:
+        if has_index(args.sentences):
+            all_sentences = word_in_index(word_list, sampler)
+        else:
+            sentence_list = total_sentence_list(word_list)
+            all_sentences = word_in_sentence(sentence_list, word_list, sampler)
+        write_output(all_sentences)
+if args.example_store:
+    example_store.build(args.outputfile, args.example_store)
@@ -1,6 +1,13 @@
 import csv
 import string
 import argparse
+import collections
+import sqlite3
+import freq_db
+import glob
+import multiprocessing
+import os
+import numpy as np
 
 def collect_words(file):
     """Takes a textfile containing a list of words from a certain category,
@@ -11,19 +18,26 @@ def collect_words(file):
         wordlist.append(i)
     return wordlist
 
-def collect_freqs(wordlist):
+def collect_freqs(wordlist, freqs):
     """Returns a list with each word form, lemma, tag and frequency 
     from the corpus total count"""
-    freqlist = []
-    for i in wordlist:
-        found = False
-        with open('allfreq.tsv', encoding='utf8') as tsvfile: #allfreq contains all word frequencies from the IGC
+    wordset = set(wordlist)
+    rows = collections.defaultdict(list) # the rows of each word form, read in a single pass
+    if freqs.endswith('.tsv'):
+        with open(freqs, encoding='utf8') as tsvfile: #allfreq contains all word frequencies from the IGC
             reader = csv.reader(tsvfile, delimiter='\t')
             for row in reader:
-                if row[0] == i: # grab the freqs of the appropriate words
-                    freqlist.append(row)
-                    found = True
-        if not found: # if the word does not exist in allfreq
+                if row[0] in wordset: # grab the freqs of the appropriate words
+                    rows[row[0]].append(row)
+    else:
+        with sqlite3.connect(freqs) as conn: # all the words are looked up in a single query
+            for row in freq_db.query(conn, 'form', wordset):
+                rows[row[0]].append(row)
+    freqlist = []
+    for i in wordlist:
+        if i in rows:
+            freqlist.extend(rows[i])
+        else: # if the word does not exist in allfreq
             freqlist.append([i, "0", "n/a", "0"])
     return freqlist
 
@@ -46,16 +60,18 @@ def createconfusionsets(result, freqlist):
     pos tags for each confusion set"""
     total_count = [] # word forms of both candidates, total freq, possible pos and individual freqs
     POS_set = [] # all pos tags of both candidates without additional information
+    rows = collections.defaultdict(list) # freqlist grouped by word form
+    for i in freqlist:
+        rows[i[0]].append(i)
     for key, count in result.items(): 
         word_count = [] 
         POS_word = [] 
         word_count.append(key)
         word_count.append(count)
-        for i in freqlist:
-            if i[0] == key:
-                word_count.append(i[2])
-                POS_word.append(i[2])
-                word_count.append(int(i[3]))
+        for i in rows[key]:
+            word_count.append(i[2])
+            POS_word.append(i[2])
+            word_count.append(int(i[3]))
         total_count.append(word_count)
         POS_set.append(POS_word)
     zipped_POS = list(zip(POS_set[::2], POS_set[1::2]))
@@ -63,30 +79,44 @@ def createconfusionsets(result, freqlist):
     return zipped_POS, zipped_cs
 
 
+def grammatical_flags(POS):
+    """Checks if the POS tags of each candidate in a confusion set are identical or disjoint
+    for all the confusion sets at once. Each candidate's tags become a row of a boolean
+    tag matrix, so the set comparisons are done on whole matrices.
+    Returns two boolean arrays, grammatically disjoint and grammatically identical"""
+    tag_ids = {}
+    for i in POS:
+        for tags in i:
+            for tag in tags:
+                tag_ids.setdefault(tag, len(tag_ids))
+    POS1 = np.zeros((len(POS), len(tag_ids)), dtype=bool)
+    POS2 = np.zeros((len(POS), len(tag_ids)), dtype=bool)
+    for n, i in enumerate(POS):
+        POS1[n, [tag_ids[tag] for tag in i[0]]] = True
+        POS2[n, [tag_ids[tag] for tag in i[1]]] = True
+    gramdis = ~(POS1 & POS2).any(axis=1) # no pos tags shared
+    gramid = (POS1 == POS2).all(axis=1) # all pos tags identical
+    return gramdis, gramid
+
+
 def identical_or_disjoint(POS, CS):
     """Checks if the POS tags of each candidate in a confusion set are identical, disjoint or neither.
     Returns a finalized list containing the confusion sets along with their binary categorical information"""
-    gramdis = [] # no pos tags shared
-    gramid = [] # all pos tags identical
-    for i in POS:
-        POS1 = set(i[0])
-        POS2 = set(i[1])
-        if len(POS1.intersection(POS2)) > 0:
-            gramdis.append("False")
-        else:
-            gramdis.append("True")
-
-        if POS1 == POS2:
-            gramid.append("True")
-        else:
-            gramid.append("False")
+    gramdis, gramid = grammatical_flags(POS)
+    gramdis = [str(x) for x in gramdis.tolist()]
+    gramid = [str(x) for x in gramid.tolist()]
     zipped_final = list(zip(CS,gramdis,gramid))
     return zipped_final
 
 
-def writeoutput(zipped_final, zipped_cs, outputfile):
-    """Creates a more CSV friendly list. Writes a csv output file, 
-    needs to be specified as a command prompt argument"""
+def min_freqs(CS):
+    """Returns the total count of the less frequent candidate of each confusion set"""
+    totals = np.array([[i[0][1], i[1][1]] for i in CS], dtype=np.int64).reshape(-1, 2)
+    return totals.min(axis=1)
+
+
+def table_rows(zipped_final, zipped_cs):
+    """Creates a more CSV friendly list"""
     final_list = [] # candidate1&freq, pos&freq, candidate2&freq, pos&freq, GD, GI
     i = 0
     while i < len(zipped_cs):
@@ -101,21 +131,88 @@ def writeoutput(zipped_final, zipped_cs, outputfile):
         placeholder_list.append(zipped_final[i][2][0:])
         i += 1
         final_list.append(placeholder_list)
+    return final_list
+
+
+header = ["Word form", "Total count", "POS tags and their frequency","Word form", "Total count", "POS tags and their frequency", "Grammatically disjoint","Grammatically identical"]
+
 
-    with open(args.outputfile, "w", newline='') as f:
+def writeoutput(zipped_final, zipped_cs, outputfile):
+    """Writes a csv output file, needs to be specified as a command prompt argument"""
+    final_list = table_rows(zipped_final, zipped_cs)
+    with open(outputfile, "w", newline='') as f:
         thewriter = csv.writer(f)
-        thewriter.writerow(["Word form", "Total count", "POS tags and their frequency","Word form", "Total count", "POS tags and their frequency", "Grammatically disjoint","Grammatically identical"])
+        thewriter.writerow(header)
         for i in final_list:
             thewriter.writerow(i)
 
-parser = argparse.ArgumentParser()
-parser.add_argument('wordlist', help="Specify a text file with a list of word candidates")
-outputfile = parser.add_argument('outputfile', help="Specify a csv output file")
-args = parser.parse_args()
-with open(args.wordlist, encoding='utf8') as data_file:
-    total_words = collect_words(data_file)
-    freqlist = collect_freqs(total_words)
+
+def category_sets(job):
+    """Returns the pos tags and the confusion sets of a wordlist file"""
+    wordlist, freqs = job
+    with open(wordlist, encoding='utf8') as data_file:
+        total_words = collect_words(data_file)
+    freqlist = collect_freqs(total_words, freqs)
     result = freqdict(freqlist)
-    POS, CS = createconfusionsets(result, freqlist)
-    zipped_final = identical_or_disjoint(POS, CS)
-    writeoutput(zipped_final, CS, outputfile)
\ No newline at end of file
+    return createconfusionsets(result, freqlist)
+
+
+# The cross category tables, split by the grammatical flags of each confusion set
+grammatical_tables = [("Grammatically identical.csv", False, True),
+                      ("Grammaticaly disjoint.csv", True, False),
+                      ("NeitherGInorGD.csv", False, False)]
+
+
+def batch(wordlists, spread_dir, table_dir, freqs, workers):
+    """Writes the spreads of every wordlist, collected in parallel, along with the tables of all
+    grammatically identical, disjoint and neither confusion sets across the categories"""
+    jobs = [(wordlist, freqs) for wordlist in wordlists]
+    with multiprocessing.Pool(workers) as pool:
+        categories = pool.map(category_sets, jobs)
+    # The flags and min frequencies of all categories are computed together
+    all_POS = [i for POS, CS in categories for i in POS]
+    all_CS = [i for POS, CS in categories for i in CS]
+    gramdis, gramid = grammatical_flags(all_POS)
+    minfreq = min_freqs(all_CS)
+    zipped_final = list(zip(all_CS, [str(x) for x in gramdis.tolist()], [str(x) for x in gramid.tolist()]))
+    final_list = table_rows(zipped_final, all_CS)
+
+    os.makedirs(spread_dir, exist_ok=True)
+    start = 0
+    for wordlist, (POS, CS) in zip(wordlists, categories):
+        category = os.path.basename(wordlist)[:-len('_wordlist.txt')]
+        with open(os.path.join(spread_dir, category + '_spread.csv'), "w", newline='') as f:
+            thewriter = csv.writer(f)
+            thewriter.writerow(header)
+            for i in final_list[start:start+len(CS)]:
+                thewriter.writerow(i)
+        start += len(CS)
+
+    os.makedirs(table_dir, exist_ok=True)
+    for filename, disjoint, identical in grammatical_tables:
+        selected = np.flatnonzero((gramdis == disjoint) & (gramid == identical))
+        with open(os.path.join(table_dir, filename), "w", newline='') as f:
+            thewriter = csv.writer(f)
+            thewriter.writerow(header + ["Min freq"])
+            for i in selected.tolist():
+                thewriter.writerow(final_list[i] + [minfreq[i]])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('wordlist', nargs='?', help="Specify a text file with a list of word candidates")
+    outputfile = parser.add_argument('outputfile', nargs='?', help="Specify a csv output file")
+    parser.add_argument('--freqs', default=freq_db.default_freqs(), help="Frequency database from gen_totalfreqs_totalsents, or allfreq.tsv (the default if there is no database)")
+    parser.add_argument('--batch', metavar='WORDLIST_DIR', help="Write the spreads of every *_wordlist.txt in this directory along with the grammatical category tables")
+    parser.add_argument('--spread-dir', default='Frequency tables', help="Where the spreads are written in batch mode")
+    parser.add_argument('--table-dir', default='Grammatical categories - freq tables', help="Where the grammatical category tables are written in batch mode")
+    parser.add_argument('--workers', type=int, default=1, help="Number of wordlists processed at once in batch mode")
+    args = parser.parse_args()
+    if args.batch:
+        wordlists = sorted(glob.glob(os.path.join(args.batch, '*_wordlist.txt')))
+        batch(wordlists, args.spread_dir, args.table_dir, args.freqs, args.workers)
+    elif args.outputfile is not None:
+        POS, CS = category_sets((args.wordlist, args.freqs))
+        zipped_final = identical_or_disjoint(POS, CS)
+        writeoutput(zipped_final, CS, args.outputfile)
+    else:
+        parser.error("either give a wordlist and an output file or a wordlist directory with --batch")
@@ -7,56 +7,280 @@ import operator
 import time
 import re
 import collections
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import json
+import hashlib
+import gzip
+import lzma
+import queue
+import tarfile
+import threading
+import zipfile
+from corpus_store import StoreWriter, SentenceStore, truncate_store
+from corpus_index import build_index
+from freq_db import build_db, DB_FILE
 
 def findFiles(path): return glob.glob(path)
+def corpusFiles(path): return [x for x in glob.glob(path, recursive=True) if x.endswith(corpus_suffixes)]
+corpus_suffixes = ('.xml', '.xml.gz', '.zip', '.tar.gz', '.tgz', '.tar.xz') # unpacked or compressed TEI files
 output_file = 'allfreq.tsv'
+sentence_file = 'all_sent' # sentence store, see corpus_store.py
 
 # XML namespace
 ns = {'tei': 'http://www.tei-c.org/ns/1.0' }
-sentences = []
-
-def text_words(teifile):
-    # Returns word freqs and sentence examples from all words in the corpus
-    root = xml.etree.ElementTree.parse(teifile).getroot()
-    for asentence in root.findall('.//tei:s',ns):
-        sentence = []
-        for i in asentence[0:]:
-            word_form = i.text
-            pos_tag = i.get('type')
-            sentence.append(word_form)
-            sentence.append(pos_tag)
-        sentences.append(sentence)
-
-    for aword in root.findall('.//tei:w',ns): 
-        word = aword.text
-        word = word.lower()
-        word = re.sub(r'[^\w\s]','',word)
-        lemma = aword.get('lemma')
-        lemma = lemma.lower()
-        lemma = re.sub(r'[^\w\s]','',lemma)
-        tag = aword.get('type')
-        tag = re.sub(r'[^\w\s]','',tag)
-
-        yield '{}\t{}\t{}'.format(word,lemma,tag)
-
-# counter object that updates word form frequencies file by file        
-c = Counter()
-
-for filename in findFiles('risamalheild/*/*.xml'):
-    c.update((text_words(filename)))
-
-# write sentence examples to file
-with open("all_sent.csv", "w", newline='', encoding="utf-8") as f:
-    thewriter = csv.writer(f)
-    for i in sentences:
-        thewriter.writerow(i)           
-
-# sort frequency list in reverse order by counts (most frequent first)
-sorted_words = reversed(sorted(c.items(), key=operator.itemgetter(1)))
-
-# make tab formatted entries for output file
-allwords = ['{}\t{}'.format(x[0],x[1]) for x in sorted_words]
-
-# write freqs to file
-with open(output_file, 'w', encoding="utf-8") as f:
-    f.write('\n'.join(allwords))
+sentence_tag = '{%s}s' % ns['tei']
+word_tag = '{%s}w' % ns['tei']
+
+def freq_entry(aword):
+    # Returns the word form, lemma and tag of a single word as a tab separated entry
+    word = aword.text
+    word = word.lower()
+    word = re.sub(r'[^\w\s]','',word)
+    lemma = aword.get('lemma')
+    lemma = lemma.lower()
+    lemma = re.sub(r'[^\w\s]','',lemma)
+    tag = aword.get('type')
+    tag = re.sub(r'[^\w\s]','',tag)
+    return '{}\t{}\t{}'.format(word,lemma,tag)
+
+def text_words(teifile, thewriter):
+    # Returns word freqs from all words in the corpus and writes the sentence examples
+    # as they are parsed. Each sentence is dropped from the tree once it has been written,
+    # so only the sentence currently being read is held in memory
+    parents = []
+    for event, elem in xml.etree.ElementTree.iterparse(teifile, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == word_tag:
+            yield freq_entry(elem)
+        elif elem.tag == sentence_tag:
+            sentence = []
+            for i in elem[0:]:
+                word_form = i.text
+                pos_tag = i.get('type')
+                sentence.append(word_form)
+                sentence.append(pos_tag)
+            thewriter.writerow(sentence)
+            if parents:
+                parents[-1].remove(elem)
+
+class Prefetcher:
+    # Reads a stream in a background thread and hands it over in chunks, so that decompressing
+    # the next part of an archive overlaps with parsing the part already read
+    def __init__(self, source, chunk_size=1 << 20, depth=8):
+        self.queue = queue.Queue(depth)
+        self.chunk = b''
+        self.pos = 0
+        self.done = False
+        self.closed = False
+        self.thread = threading.Thread(target=self.fill, args=(source, chunk_size), daemon=True)
+        self.thread.start()
+
+    def fill(self, source, chunk_size):
+        try:
+            while not self.closed:
+                chunk = source.read(chunk_size)
+                self.put(chunk)
+                if not chunk:
+                    break
+        except Exception as e:
+            self.put(e)
+
+    def put(self, item):
+        while not self.closed:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def read(self, size=-1):
+        parts = []
+        while size != 0:
+            if self.pos == len(self.chunk):
+                if self.done:
+                    break
+                self.chunk = self.queue.get()
+                self.pos = 0
+                if isinstance(self.chunk, Exception):
+                    raise self.chunk
+                if not self.chunk:
+                    self.done = True
+                    continue
+            n = len(self.chunk) - self.pos
+            if size > 0:
+                n = min(n, size)
+                size -= n
+            parts.append(self.chunk[self.pos:self.pos+n])
+            self.pos += n
+        return b''.join(parts)
+
+    def close(self):
+        self.closed = True
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def documents(filename):
+    # Yields every TEI document in a corpus file: the file itself if it is unpacked XML,
+    # otherwise a stream that is decompressed in the background while it is being parsed
+    if filename.endswith('.zip'):
+        with zipfile.ZipFile(filename) as archive:
+            for member in archive.namelist():
+                if member.endswith('.xml'):
+                    with archive.open(member) as raw, Prefetcher(raw) as f:
+                        yield f
+    elif filename.endswith(('.tar.gz', '.tgz', '.tar.xz')):
+        opener = lzma.open if filename.endswith('.xz') else gzip.open
+        with opener(filename) as raw, Prefetcher(raw) as f:
+            with tarfile.open(fileobj=f, mode='r|') as archive: # members are read in order without seeking
+                for member in archive:
+                    if member.isfile() and member.name.endswith('.xml'):
+                        yield archive.extractfile(member)
+    elif filename.endswith('.gz'):
+        with gzip.open(filename) as raw, Prefetcher(raw) as f:
+            yield f
+    else:
+        yield filename
+
+def process_file(job):
+    # Counts the words of a single file and writes its sentences to a shard of their own,
+    # so that files can be handled by separate worker processes
+    filename, shard = job
+    c = Counter()
+    with open(shard, "w", newline='', encoding="utf-8") as f:
+        thewriter = csv.writer(f)
+        for document in documents(filename):
+            c.update(text_words(document, thewriter))
+    return c
+
+def file_state(filename):
+    # The size and modification time of a file, used to tell if it has changed since the last run
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def read_counts(path):
+    # Reads a frequency file written by write_counts back into a counter
+    c = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            key, count = line.rstrip('\n').rsplit('\t', 1)
+            c[key] += int(count)
+    return c
+
+def write_counts(c, path):
+    # sort frequency list in reverse order by counts (most frequent first)
+    sorted_words = reversed(sorted(c.items(), key=operator.itemgetter(1)))
+
+    # make tab formatted entries for output file
+    allwords = ['{}\t{}'.format(x[0],x[1]) for x in sorted_words]
+
+    # write freqs to file
+    with open(path, 'w', encoding="utf-8") as f:
+        f.write('\n'.join(allwords))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes used to parse the corpus files")
+    parser.add_argument('--incremental', action='store_true', help="Only parse files that are new or have changed since the last run")
+    parser.add_argument('--cache-dir', default='ingest_cache', help="Directory for the file manifest and the counts of each file")
+    args = parser.parse_args()
+    manifest_file = os.path.join(args.cache_dir, 'manifest.json')
+
+    # The manifest maps each parsed file to its state, the range of its sentences
+    # in the sentence store and a file holding its word counts. It is removed before the
+    # outputs it describes are replaced and written again once they all are, so a run that
+    # does not finish leaves either no manifest, and the next run starts over, or the manifest
+    # of the last finished run with new sentences appended to the store, which are dropped
+    old_manifest = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file, encoding="utf-8") as f:
+            old_manifest = json.load(f)
+    manifest = {}
+    if args.incremental and old_manifest and all(os.path.exists(x) for x in (output_file, sentence_file)):
+        if truncate_store(sentence_file, max(x['end'] for x in old_manifest.values())):
+            manifest = old_manifest
+    if not manifest and os.path.exists(manifest_file):
+        os.remove(manifest_file)
+    os.makedirs(args.cache_dir, exist_ok=True)
+
+    # files are always merged in the same order, no matter which worker finishes first
+    filenames = sorted(corpusFiles('risamalheild/**/*'))
+    unchanged = set(x for x in filenames if x in manifest and manifest[x]['state'] == file_state(x))
+    todo = [x for x in filenames if x not in unchanged]
+    dropped = [x for x in manifest if x not in unchanged] # files that have changed or been removed
+
+    # counter object that updates word form frequencies file by file        
+    c = Counter()
+    if manifest:
+        c = read_counts(output_file)
+    for filename in dropped:
+        c.subtract(read_counts(manifest[filename]['counts']))
+    c = +c # forget words that no longer appear in the corpus
+    manifest = {x: old_manifest[x] for x in unchanged}
+
+    # New files can simply be appended to the sentence store, but if some have changed
+    # or been removed the store is rebuilt from the unchanged ranges and the new shards
+    rewrite = len(dropped) > 0
+    if rewrite:
+        old_sentences = SentenceStore(sentence_file)
+        new_sentence_file = sentence_file + '.tmp'
+        shutil.rmtree(new_sentence_file, ignore_errors=True)
+    else:
+        new_sentence_file = sentence_file
+        if not manifest:
+            shutil.rmtree(sentence_file, ignore_errors=True)
+
+    with tempfile.TemporaryDirectory(dir='.') as shard_dir, multiprocessing.Pool(args.workers) as pool:
+        jobs = [(filename, os.path.join(shard_dir, '{}.csv'.format(n))) for n, filename in enumerate(todo)]
+        parsed = zip(jobs, pool.imap(process_file, jobs))
+        with StoreWriter(new_sentence_file, append=bool(manifest) and not rewrite) as writer:
+            for filename in filenames:
+                start = writer.length
+                if filename in unchanged:
+                    if not rewrite:
+                        continue
+                    writer.copy_sentences(old_sentences, old_manifest[filename]['start'], old_manifest[filename]['end'])
+                    counts = old_manifest[filename]['counts']
+                else:
+                    # sentence shards are appended to the sentence file as soon as their turn comes up
+                    (_, shard), file_counts = next(parsed)
+                    c.update(file_counts)
+                    # named after the state of the file too, so the counts of the old version are kept until the manifest no longer lists them
+                    key = '{}\t{}'.format(filename, file_state(filename))
+                    counts = os.path.join(args.cache_dir, hashlib.md5(key.encode('utf-8')).hexdigest() + '.tsv')
+                    write_counts(file_counts, counts)
+                    with open(shard, newline='', encoding="utf-8") as shard_file:
+                        for row in csv.reader(shard_file):
+                            writer.add(row)
+                    os.remove(shard)
+                manifest[filename] = {'state': file_state(filename), 'start': start, 'end': writer.length, 'counts': counts}
+
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
+    if rewrite:
+        del old_sentences
+        shutil.rmtree(sentence_file)
+        os.replace(new_sentence_file, sentence_file)
+    build_index(sentence_file) # word form to sentence postings, see corpus_index.py
+    write_counts(c, output_file)
+    build_db(output_file, DB_FILE) # indexed copy of the frequencies, see freq_db.py
+    with open(manifest_file + '.tmp', 'w', encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_file + '.tmp', manifest_file)
+    # only the count files this tool wrote and no longer lists are removed
+    kept = set(x['counts'] for x in manifest.values())
+    for x in old_manifest.values():
+        if x['counts'] not in kept and os.path.exists(x['counts']):
+            os.remove(x['counts'])
+    print("Parsed {} files, kept {} and dropped {}".format(len(todo), len(unchanged), len(dropped)))
@@ -1,9 +1,11 @@
 import argparse 
 import csv
 import time
-start_time = time.clock()
-
-MII_wordlist = open("ordmyndalisti.txt", "r", encoding='utf-8')
+from corpus_store import open_sentences, SentenceStore
+from corpus_index import CorpusIndex, has_index
+from lexicon_index import LexiconIndex
+import freq_db
+import sqlite3
 
 def grab_MII_words(MII_wordlist):
     """Returns a list of all words from the Database of Modern Icelandic Inflection"""
@@ -15,104 +17,173 @@ def grab_MII_words(MII_wordlist):
     return all_words    
 
 
-def word_in_allfreq(all_words):
-    """Check if the words from the DoMII actually exist in the Gigaword corpus"""
+def word_in_allfreq(all_words, freqs='allfreq.tsv'):
+    """Check if the words from the DoMII actually exist in the Gigaword corpus,
+    using either allfreq.tsv or the frequency database"""
     actual_words = []
-    freqwords = []
-    with open('allfreq.tsv', encoding='utf8') as tsvfile:
-        reader = csv.reader(tsvfile, delimiter='\t')
-        for row in reader:
-            freqwords.append(row[0])
+    if freqs.endswith('.tsv'):
+        freqwords = set()
+        with open(freqs, encoding='utf8') as tsvfile:
+            reader = csv.reader(tsvfile, delimiter='\t')
+            for row in reader:
+                freqwords.add(row[0])
+    else:
+        with sqlite3.connect(freqs) as conn:
+            freqwords = freq_db.existing_forms(conn, all_words)
     for word in all_words:
         if word in freqwords:
             actual_words.append(word)
     return actual_words
 
 
-def find_candidate1(actual_words):
-    """Returns a list of all words containing CS candidate 1"""
-    cand1words = []
-    for word in actual_words:
-        if args.candidate1 in word:
-            cand1words.append(word) 
+def find_candidate1(actual_words, candidate1, lexicon_index):
+    """Returns a dictionary from all words containing CS candidate 1 to the positions it
+    appears at. The words are looked up in the substring index of the lexicon and kept
+    if they are in the set of words that exist in the corpus"""
+    cand1words = {}
+    for word, positions in lexicon_index.occurrences(candidate1).items():
+        if word in actual_words:
+            cand1words[word] = positions
     return cand1words
 
 
-def check_candidate2(cand1words):
-    """Replaces candidate 1 with candidate 2 (both instances if more than one appearance).
-    Returns a list of words without considering if the changed word really exists"""
-    word_list = []
-    for word in cand1words:
-        newword = word.replace(args.candidate1, args.candidate2, 1)
-        newword_backwards = word[::-1].replace(args.candidate1, args.candidate2,1)
+def check_candidate2(cand1words, candidate1, candidate2, all_positions=False):
+    """Replaces candidate 1 with candidate 2 (both instances if more than one appearance,
+    or every instance one at a time with all_positions). Returns a dictionary from each changed
+    word to the word it was made from, without considering if the changed word really exists"""
+    word_list = {}
+    for word, positions in cand1words.items():
+        if all_positions:
+            for p in positions:
+                word_list.setdefault(word[:p] + candidate2 + word[p+len(candidate1):], word)
+            continue
+        newword = word.replace(candidate1, candidate2, 1)
+        newword_backwards = word[::-1].replace(candidate1, candidate2,1)
         newword_backwards = newword_backwards[::-1]
-        word_list.append(newword)
-        word_list.append(newword_backwards)
+        word_list.setdefault(newword, word)
+        word_list.setdefault(newword_backwards, word)
     return word_list
 
 
-def check_if_real_word(word_list,cand1words):
-    """Checks if the words from the previous function exist in the MII.
-    Really slow"""
+def check_if_real_word(word_list, all_words):
+    """Checks if the words from the previous function exist in the MII"""
     real_words = []
+    word_set = set(word_list)
     for i in all_words:
-        if i in word_list:
+        if i in word_set:
             real_words.append(i)
     return real_words
 
-def check_sent(real_words):
-    """Check if there are sentence examples containing these words in the IGC"""
-    words = []
-    with open("all_sent.csv", "r", encoding="utf-8") as csv_file:
-        csv_reader = csv.reader(csv_file)
-        for row in csv_reader:
-            for i in real_words:
-                if i in row:
-                    if i not in words:
-                        words.append(i)
-    return words
-
-def check_things(words, cand1words):
-    """Returns a list of viable confusion sets"""
+def first_sentences(real_words):
+    """Returns the number of the first sentence in the IGC containing each of the words,
+    for the words that have sentence examples"""
+    sentences = open_sentences(args.sentences)
+    if isinstance(sentences, SentenceStore): # The store can look the words up without decoding any sentences
+        if has_index(args.sentences):
+            found = CorpusIndex(sentences).sentences(set(real_words))
+            return {i: int(found[i][0]) for i in found if len(found[i]) > 0}
+        return sentences.first_sentences(real_words)
+    first = {}
+    remaining = set(real_words)
+    for n, row in enumerate(sentences):
+        found = remaining.intersection(row) # Words not found before that appear in this sentence
+        for i in found:
+            first[i] = n
+        remaining -= found
+        if not remaining:
+            break
+    return first
+
+def check_sent(real_words, first):
+    """Check if there are sentence examples containing these words in the IGC.
+    The words are ordered by the first sentence they appear in"""
+    order = {}
+    for n, i in enumerate(real_words):
+        if i in first:
+            order.setdefault(i, n)
+    return sorted(order, key=lambda i: (first[i], order[i]))
+
+def check_things(words, cand1words, candidate1, candidate2, counterparts=None):
+    """Returns a list of viable confusion sets. The counterpart of each word is found by
+    changing candidate 2 back to candidate 1, or looked up in counterparts if it is given"""
+    def counterpart(word):
+        if counterparts is not None:
+            return counterparts.get(word)
+        return word.replace(candidate2, candidate1, 1)
+
     cslist = [] # Do the words in real_words have counterparts with the other candidate?
     for i in words:
         cslist.append(i)
-        newword = i.replace(args.candidate2, args.candidate1,1)
+        newword = counterpart(i)
         if newword in cand1words:
             cslist.append(newword)
-    cs_list = [] # Make sure only one copy of each word makes it to the final list
-    for i in cslist:
-        if i not in cs_list:
-            cs_list.append(i)
+    cs_list = list(dict.fromkeys(cslist)) # Make sure only one copy of each word makes it to the final list
     cs_final = [] # Finalized confusion sets with only two words per pair, making sure no triples make it through
     i = 0
     while i <= (len(cs_list) - 2):
         cand1 = cs_list[i]
-        if cs_list[i+1] == cand1.replace(args.candidate2, args.candidate1, 1):
+        if cs_list[i+1] == counterpart(cand1):
             cs_final.append(cs_list[i])
             cs_final.append(cs_list[i+1])
         i += 1
     return cs_final
 
-def write_output(cs_final):
+def write_output(cs_final, outputfile):
     """Specify outputfile as a command prompt argument"""
-    with open(args.outputfile, 'w', encoding='utf8') as f:
+    with open(outputfile, 'w', encoding='utf8') as f:
         for i in cs_final:
             f.write(str(i) + '\n')
 
+def read_rules(specfile):
+    """Returns the substitution rules of a specification file, one rule per line:
+    the output file, candidate 1 and candidate 2 separated by whitespace.
+    Empty lines and lines starting with # are skipped"""
+    rules = []
+    with open(specfile, encoding='utf8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                outputfile, candidate1, candidate2 = line.split()
+                rules.append((outputfile, candidate1, candidate2))
+    return rules
+
 parser = argparse.ArgumentParser()
-outputfile = parser.add_argument('outputfile', help="Specify a txt output file")
-candidate1 = parser.add_argument('candidate1', help="Which letters does candidate 1 contain?")
-candidate2 = parser.add_argument('candidate2', help="Which letters does candidate 2 contain?")
-args = parser.parse_args()
-
-all_words = grab_MII_words(MII_wordlist)
-actual_words = word_in_allfreq(all_words)
-cand1words = find_candidate1(actual_words)
-word_list = check_candidate2(cand1words)
-real_words = check_if_real_word(word_list, cand1words)
-words = check_sent(real_words)
-cs_final = check_things(words, cand1words)
-write_output(cs_final)
-
-print("--- %s seconds ---" % (time.clock() - start_time))
+outputfile = parser.add_argument('outputfile', nargs='?', help="Specify a txt output file")
+candidate1 = parser.add_argument('candidate1', nargs='?', help="Which letters does candidate 1 contain?")
+candidate2 = parser.add_argument('candidate2', nargs='?', help="Which letters does candidate 2 contain?")
+parser.add_argument('--sentences', default='all_sent', help="Sentence store from gen_totalfreqs_totalsents (or a sentence file in the CSV format)")
+parser.add_argument('--batch', help="Specification file with one substitution rule per line (outputfile candidate1 candidate2), all generated in one run")
+parser.add_argument('--freqs', default=freq_db.default_freqs(), help="Frequency database from gen_totalfreqs_totalsents, or allfreq.tsv (the default if there is no database)")
+parser.add_argument('--all-positions', action='store_true', help="Replace candidate 1 at every position it appears at, not only the first and the last one")
+parser.add_argument('--lexicon-index', default='ordmyndalisti.idx', help="Cache file for the substring index of the lexicon, rebuilt when ordmyndalisti.txt changes")
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    if args.batch:
+        rules = read_rules(args.batch)
+    elif args.candidate2 is not None:
+        rules = [(args.outputfile, args.candidate1, args.candidate2)]
+    else:
+        parser.error("either give an output file and both candidates or a specification file with --batch")
+    start_time = time.perf_counter()
+
+    # The lexicon, the frequency list and the sentences are read once for all the rules
+    with open("ordmyndalisti.txt", "r", encoding='utf-8') as MII_wordlist:
+        all_words = grab_MII_words(MII_wordlist)
+    actual_words = set(word_in_allfreq(all_words, args.freqs))
+    lexicon_index = LexiconIndex.cached("ordmyndalisti.txt", list(dict.fromkeys(all_words)), args.lexicon_index)
+    candidates = []
+    all_real_words = []
+    for outputfile, candidate1, candidate2 in rules:
+        cand1words = find_candidate1(actual_words, candidate1, lexicon_index)
+        word_list = check_candidate2(cand1words, candidate1, candidate2, args.all_positions)
+        real_words = check_if_real_word(word_list, all_words)
+        candidates.append((cand1words, real_words, word_list))
+        all_real_words.extend(real_words)
+    first = first_sentences(all_real_words)
+    for (outputfile, candidate1, candidate2), (cand1words, real_words, word_list) in zip(rules, candidates):
+        words = check_sent(real_words, first)
+        cs_final = check_things(words, cand1words, candidate1, candidate2, word_list if args.all_positions else None)
+        write_output(cs_final, outputfile)
+
+    print("--- %s seconds ---" % (time.perf_counter() - start_time))
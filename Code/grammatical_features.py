@@ -0,0 +1,59 @@
+import re
+import numpy as np
+
+# The context words the features of the grammatical classifiers look at
+LEFT = 0 # the word immediately to the left of the target word
+RIGHT = 1 # the word immediately to the right
+LEFT_TWO = 2 # the word two words to the left
+
+# The features: column of the feature vector, context word and the pattern its PoS tag is matched against
+FEATURES = [
+    (0, LEFT, r'^[n|l|f|g|t]'), # Words with grammatical case, such as nouns and pronouns
+    (1, RIGHT, r'^[n|l|f|g|t]'),
+    (2, LEFT, r'^[sb|sf|sv]'), # A verb that inflects for person agreement
+    (3, RIGHT, r'^[sb|sf|sv]'),
+    (4, LEFT, r'^[nn|ln|fn|gn|tn]'),
+    (5, RIGHT, r'^[nn|ln|fn|gn|tn]'),
+    (6, LEFT, r'^[no|lo|fo|go|to|nþ|lþ|fþ|gþ|tþ|ne|le|fe|ge|te]'), # Has some grammatical case other than nominative
+    (7, RIGHT, r'^[no|lo|fo|go|to|nþ|lþ|fþ|gþ|tþ|ne|le|fe|ge|te]'),
+    (8, LEFT, r'^[a|c]'),
+    (9, RIGHT, r'^[a|c]'),
+    (10, LEFT_TWO, r'^[fpv|nv]'),
+    (11, LEFT_TWO, r'^[fpk|nk]'),
+    (12, LEFT, r'^[cn]'),
+    (13, RIGHT, r'^[cn]'),
+    (14, LEFT, r'^[sn]'),
+    (15, RIGHT, r'^[sn]'),
+]
+PATTERNS = [(column, context, re.compile(pattern)) for column, context, pattern in FEATURES]
+BITS = np.arange(len(FEATURES), dtype=np.uint16)
+
+
+class FeatureTable:
+    """The features of each PoS tag as a bitmask for each context word. A tag is matched against
+    the patterns once, the first time it is seen, and the feature vectors of all the examples of
+    a word are then put together by indexing the bitmasks with the ids of their context tags"""
+
+    def __init__(self):
+        self.ids = {}
+        self.masks = np.zeros((3, 0), dtype=np.uint16)
+
+    def tag_ids(self, tags):
+        """Returns the ids of a list of tags, adding the bitmasks of tags not seen before"""
+        new = [tag for tag in dict.fromkeys(tags) if tag not in self.ids]
+        if new:
+            masks = np.zeros((3, len(new)), dtype=np.uint16)
+            for n, tag in enumerate(new):
+                self.ids[tag] = len(self.ids)
+                for column, context, pattern in PATTERNS:
+                    if pattern.search(tag):
+                        masks[context, n] |= 1 << column
+            self.masks = np.concatenate((self.masks, masks), axis=1)
+        return np.array([self.ids[tag] for tag in tags], dtype=np.intp)
+
+    def matrix(self, contexts):
+        """Returns the feature vectors of a list of (left, right, two to the left) context words,
+        each a (word form, tag) tuple"""
+        ids = self.tag_ids([word[1] for context in contexts for word in context]).reshape(-1, 3)
+        bits = self.masks[LEFT][ids[:, LEFT]] | self.masks[RIGHT][ids[:, RIGHT]] | self.masks[LEFT_TWO][ids[:, LEFT_TWO]]
+        return ((bits[:, None] >> BITS) & 1).astype(float)
@@ -0,0 +1,84 @@
+import os
+from array import array
+import numpy as np
+
+
+def join_strings(strings):
+    """Packs a list of strings into a byte array so it can be saved with numpy"""
+    return np.frombuffer('\n'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+
+def split_strings(data):
+    """Unpacks a byte array made by join_strings"""
+    return data.tobytes().decode('utf-8').split('\n')
+
+
+class LexiconIndex:
+    """Substring index over the word forms of the lexicon. Every substring of up to max_gram
+    letters has a postings list of (word id, position) pairs, so the words containing a short
+    string are found without going through the lexicon. Longer strings are looked up by their
+    first max_gram letters and then checked against the word"""
+
+    def __init__(self, words, grams, offsets, word_ids, positions):
+        self.words = words
+        self.grams = {g: i for i, g in enumerate(grams)}
+        self.max_gram = max((len(g) for g in grams), default=0)
+        self.offsets = offsets
+        self.word_ids = word_ids
+        self.positions = positions
+
+    @classmethod
+    def build(cls, words, max_gram=2):
+        """Indexes a list of unique word forms"""
+        postings = {}
+        for word_id, word in enumerate(words):
+            for n in range(1, max_gram + 1):
+                for p in range(len(word) - n + 1):
+                    gram = word[p:p+n]
+                    entry = postings.get(gram)
+                    if entry is None:
+                        entry = postings[gram] = (array('i'), array('i'))
+                    entry[0].append(word_id)
+                    entry[1].append(p)
+        grams = sorted(postings)
+        offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[g][0]) for g in grams])
+        word_ids = np.zeros(offsets[-1], dtype=np.int32)
+        positions = np.zeros(offsets[-1], dtype=np.int32)
+        for i, g in enumerate(grams):
+            word_ids[offsets[i]:offsets[i+1]] = postings[g][0]
+            positions[offsets[i]:offsets[i+1]] = postings[g][1]
+        return cls(words, grams, offsets, word_ids, positions)
+
+    @classmethod
+    def cached(cls, lexiconfile, words, cachefile):
+        """Loads the index of a lexicon file from cachefile, building and saving it first
+        if there is no cache or the lexicon has changed since it was built"""
+        stat = os.stat(lexiconfile)
+        state = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        if os.path.exists(cachefile):
+            with np.load(cachefile) as cache:
+                if np.array_equal(cache['state'], state):
+                    return cls(split_strings(cache['words']), split_strings(cache['grams']),
+                               cache['offsets'], cache['word_ids'], cache['positions'])
+        index = cls.build(words)
+        with open(cachefile, 'wb') as f: # np.savez would add .npz to a path without it
+            np.savez(f, state=state, words=join_strings(index.words), grams=join_strings(sorted(index.grams, key=index.grams.get)),
+                     offsets=index.offsets, word_ids=index.word_ids, positions=index.positions)
+        return index
+
+    def occurrences(self, substring):
+        """Returns a dictionary from each word form containing the substring to the positions
+        it starts at, in lexicon order"""
+        if not substring:
+            raise ValueError("Cannot look up an empty string")
+        gram = self.grams.get(substring[:self.max_gram])
+        result = {}
+        if gram is None:
+            return result
+        low, high = self.offsets[gram], self.offsets[gram+1]
+        for word_id, p in zip(self.word_ids[low:high].tolist(), self.positions[low:high].tolist()):
+            word = self.words[word_id]
+            if len(substring) <= self.max_gram or word.startswith(substring, p):
+                result.setdefault(word, []).append(p)
+        return result
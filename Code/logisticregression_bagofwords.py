@@ -8,45 +8,11 @@ import argparse
 import matplotlib.pyplot as plt
 import pydotplus
 import collections
+from example_store import open_examples
+from bag_of_words import bow_matrix, hashed_bow_matrix
 from gensim import corpora
-from gensim import matutils
 
 
-def preprocess(file):
-    """Takes a txt file containing all sentence examples from the category as an input. 
-    Outputs a list of all sentences from the file """
-    data = file.read()
-    data = data.split(";;")
-    sent = []
-    for i in data:
-        i = i.split("punctuation")
-        for x in i:
-            x = x.split()
-            sent.append(x)
-    return sent
-
-
-def tuple_sent(sent):
-    """Takes each sentence and outputs each word and PoS tag as a tuple"""
-    tupled_sentences = []
-    for i in sent:
-        tupled_sentences.append(list(zip(i[::2], i[1::2])))
-    return tupled_sentences
-
-
-def sent_list(sent, target_word, n):
-    """Checks if the chosen word pair exists in each sentence. 
-    Outputs a list of sentences containing the words"""
-    sent_list = []
-    target_vector = []
-    for i in sent:
-        for x in i:
-            word = x[0]
-            if word == target_word:
-                sent_list.append(i)
-                target_vector.append(n)
-    return sent_list, target_vector
-
 def remove_postag(sent_list_1, sent_list_2, target_word_1, target_word_2):
     """Remove the pos tag"""
     update_sent_list = []
@@ -67,10 +33,9 @@ def remove_postag(sent_list_1, sent_list_2, target_word_1, target_word_2):
 def gensimthings(sent_list):
     """Creates a bag of words model"""
     dictionary = corpora.Dictionary(sent_list)
-    sparse_vector = [dictionary.doc2bow(tokens) for tokens in sent_list]
-    dense_vector= matutils.corpus2dense(sparse_vector,num_terms=len(dictionary.token2id))
+    sparse_vector = bow_matrix(sent_list, dictionary.token2id, np.float32) # Kept sparse, the model takes it as it is
     vocab = list(dictionary.values())
-    return dense_vector.T, vocab
+    return sparse_vector, vocab
 
 def automate(wordfile):
     words = []
@@ -82,6 +47,7 @@ def automate(wordfile):
     with open(args.wordfile, encoding='utf8') as wordfile:
         for word in wordfile:
             words.append(word.rstrip())
+    store = open_examples(args.filename, words) # Only the examples of the two words of a pair are read at a time. A text file of sentences is first sorted into a temporary example store
     count = 0
     while len(words) > count:
         target_word_1 = words[count]
@@ -89,14 +55,17 @@ def automate(wordfile):
         target_word_2 = words[count]
         count += 1
 
-        with open(args.filename, encoding='utf8') as data_file: # The datafile contains all sentence examples of the category in consideration
-            sent = preprocess(data_file)
-            sentences = tuple_sent(sent)
-            sent_list_1, target1 = sent_list(sentences, target_word_1, 0)
-            sent_list_2, target2 = sent_list(sentences, target_word_2, 1)
-            total_sent_list = remove_postag(sent_list_1, sent_list_2, target_word_1, target_word_2)
+        sent_list_1 = store.examples(target_word_1)
+        sent_list_2 = store.examples(target_word_2)
+        target1 = [0] * len(sent_list_1)
+        target2 = [1] * len(sent_list_2)
+        total_sent_list = remove_postag(sent_list_1, sent_list_2, target_word_1, target_word_2)
+        if args.hash_buckets:
+            data = hashed_bow_matrix(total_sent_list, args.hash_buckets)
+            vocab = [str(i) for i in range(args.hash_buckets)] # The columns are hash buckets rather than words
+        else:
             data, vocab = gensimthings(total_sent_list)
-            target = np.concatenate((target1,target2), axis=0)
+        target = np.concatenate((target1,target2), axis=0)
 
         model = LogisticRegression()
         model.fit(data,target)
@@ -130,6 +99,7 @@ def automate(wordfile):
         plt.ylabel('Stuðull')
         plt.title('Mikilvægi þátta með orðaskjóðu, lógístískt aðhvarf')
         plt.show() # A bar chart containing the importance of each feature (should be restricted in order to be readable)
+    store.close()
         
     print("Accuracy: ", accuracy)
     print("Precision: ", precision)
@@ -137,10 +107,11 @@ def automate(wordfile):
     print("F-score: " ,fscore)
     
 
-parser = argparse.ArgumentParser()
-parser.add_argument('filename') # Sentence examples
-parser.add_argument('wordfile') # List of words
-args = parser.parse_args()
-
-automate(args.wordfile)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('filename') # Sentence examples
+    parser.add_argument('wordfile') # List of words
+    parser.add_argument('--hash-buckets', type=int, help="Count the words in this many columns picked by a signed hash of each word (the hashing trick) instead of one column for each word of the vocabulary")
+    args = parser.parse_args()
 
+    automate(args.wordfile)
@@ -0,0 +1,133 @@
+import argparse
+import collections
+import csv
+import os
+import time
+from gen_wordlist import grab_MII_words
+
+
+def form_frequencies():
+    """Returns the total frequency of each word form in the Gigaword corpus"""
+    freqs = collections.Counter()
+    with open('allfreq.tsv', encoding='utf8') as tsvfile:
+        reader = csv.reader(tsvfile, delimiter='\t')
+        for row in reader:
+            freqs[row[0]] += int(row[-1])
+    return freqs
+
+
+def substitution_pairs(words):
+    """Returns the pairs of words that differ by a single substituted letter, by edit type.
+    Words are grouped by their length and the rest of the word once the letter at a position
+    has been taken out, one position at a time, so only words in the same group are compared"""
+    pairs = collections.defaultdict(set)
+    longest = max((len(word) for word in words), default=0)
+    for i in range(longest):
+        groups = collections.defaultdict(list)
+        for word in words:
+            if len(word) > i:
+                groups[(len(word), word[:i] + word[i+1:])].append(word)
+        for group in groups.values():
+            for n, word1 in enumerate(group):
+                for word2 in group[n+1:]:
+                    a, b = sorted((word1, word2), key=lambda w: w[i])
+                    pairs['{}/{}'.format(a[i], b[i])].add((a, b))
+    return pairs
+
+
+def deletion_pairs(words):
+    """Returns the pairs of words where the second is the first with a single letter removed,
+    by edit type. Removing one of two identical letters in a row counts as a length edit (nn/n)"""
+    pairs = collections.defaultdict(set)
+    word_set = set(words)
+    for word in words:
+        for i, letter in enumerate(word):
+            shorter = word[:i] + word[i+1:]
+            if shorter in word_set:
+                if word[i-1:i] == letter or word[i+1:i+2] == letter:
+                    edit = '{}{}/{}'.format(letter, letter, letter)
+                else:
+                    edit = '{}/'.format(letter)
+                pairs[edit].add((word, shorter))
+    return pairs
+
+
+def rule_pairs(words, rules):
+    """Returns the pairs of words where replacing one occurrence of a in the first with b gives
+    the second, for each (a, b) rule of an edit alphabet"""
+    pairs = collections.defaultdict(set)
+    word_set = set(words)
+    for a, b in rules:
+        for word in words:
+            start = word.find(a)
+            while start != -1:
+                newword = word[:start] + b + word[start+len(a):]
+                if newword != word and newword in word_set:
+                    pairs['{}/{}'.format(a, b)].add((word, newword))
+                start = word.find(a, start + 1)
+    return pairs
+
+
+def read_alphabet(alphabetfile):
+    """Returns the edit rules of an alphabet file, one rule per line with the two
+    spellings separated by whitespace. Lines starting with # are skipped"""
+    rules = []
+    with open(alphabetfile, encoding='utf8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                a, b = line.split()
+                rules.append((a, b))
+    return rules
+
+
+def write_output(pairs, freqs, outputfile):
+    """Writes every pair with the frequencies of both words, the most common edit types first"""
+    with open(outputfile, 'w', newline='', encoding='utf8') as f:
+        thewriter = csv.writer(f, delimiter='\t')
+        thewriter.writerow(["Edit", "Word form", "Total count", "Word form", "Total count"])
+        for edit in sorted(pairs, key=lambda x: (-len(pairs[x]), x)):
+            for word1, word2 in sorted(pairs[edit], key=lambda x: (-min(freqs[x[0]], freqs[x[1]]), x)):
+                thewriter.writerow([edit, word1, freqs[word1], word2, freqs[word2]])
+
+
+def write_wordlists(pairs, directory):
+    """Writes a wordlist for each edit type in the format of gen_wordlist.py"""
+    os.makedirs(directory, exist_ok=True)
+    for edit, edit_pairs in pairs.items():
+        if edit.endswith('/'):
+            filename = edit[:-1] + '_deleted'
+        else:
+            filename = edit.replace('/', '_')
+        with open(os.path.join(directory, filename + '_wordlist.txt'), 'w', encoding='utf8') as f:
+            for word1, word2 in sorted(edit_pairs):
+                f.write(word1 + '\n')
+                f.write(word2 + '\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Finds every pair of attested word forms in the DoMII that are a single edit apart")
+    parser.add_argument('outputfile', help="Specify a tsv output file")
+    parser.add_argument('--alphabet', help="File with the orthographic edits to look for, one pair of spellings per line (for example nn n). By default every single letter substitution and deletion is used")
+    parser.add_argument('--min-freq', type=int, default=1, help="Only keep pairs where both words appear at least this often in the IGC")
+    parser.add_argument('--wordlist-dir', help="Also write a wordlist for each edit type to this directory")
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+
+    with open("ordmyndalisti.txt", "r", encoding='utf-8') as MII_wordlist:
+        all_words = grab_MII_words(MII_wordlist)
+    freqs = form_frequencies()
+    words = [word for word in dict.fromkeys(all_words) if freqs[word] >= args.min_freq]
+
+    if args.alphabet:
+        pairs = rule_pairs(words, read_alphabet(args.alphabet))
+    else:
+        pairs = substitution_pairs(words)
+        pairs.update(deletion_pairs(words))
+    write_output(pairs, freqs, args.outputfile)
+    if args.wordlist_dir:
+        write_wordlists(pairs, args.wordlist_dir)
+
+    for edit in sorted(pairs, key=lambda x: (-len(pairs[x]), x)):
+        print(edit, len(pairs[edit]))
+    print("--- %s seconds ---" % (time.perf_counter() - start_time))
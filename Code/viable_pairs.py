@@ -0,0 +1,82 @@
+import argparse
+import csv
+import glob
+import os
+
+# Grammatical status of a confusion set, from the disjoint and identical columns of a spread
+STATUSES = {('True', 'False'): 'disjoint', ('False', 'True'): 'identical', ('False', 'False'): 'neither'}
+
+
+def read_spread(spreadfile):
+    """Yields the two word forms, the frequency of the less frequent one and the grammatical
+    status of each confusion set in a spread or cross category table from gen_spreads.py"""
+    with open(spreadfile, encoding='utf8') as f:
+        reader = csv.reader(f)
+        next(reader) # header
+        for row in reader:
+            status = STATUSES.get((row[6], row[7]), 'neither')
+            yield row[0], row[3], min(int(row[1]), int(row[4])), status
+
+
+def filter_pairs(pairs, min_count, statuses):
+    """Splits the confusion sets into the ones a classifier can be evaluated on and the skipped
+    ones along with the reason they were skipped"""
+    viable = []
+    skipped = []
+    for word1, word2, minfreq, status in pairs:
+        if minfreq < min_count:
+            skipped.append((word1, word2, minfreq, status, "minority count below {}".format(min_count)))
+        elif status not in statuses:
+            skipped.append((word1, word2, minfreq, status, "grammatically " + status))
+        else:
+            viable.append((word1, word2))
+    return viable, skipped
+
+
+def write_pairs(viable, outputfile):
+    """Writes the viable pairs as a word list for the classifier scripts, one candidate per line"""
+    with open(outputfile, 'w', encoding='utf8') as f:
+        for word1, word2 in viable:
+            f.write(word1 + '\n')
+            f.write(word2 + '\n')
+
+
+def write_report(skipped, reportfile):
+    """Writes every skipped pair with its minority count, grammatical status and the reason it was skipped"""
+    with open(reportfile, 'w', newline='', encoding='utf8') as f:
+        thewriter = csv.writer(f)
+        thewriter.writerow(["Category", "Word form", "Word form", "Min freq", "Status", "Reason"])
+        for row in skipped:
+            thewriter.writerow(row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Picks the confusion sets of a spread from gen_spreads.py that have enough examples to be evaluated by the classifier scripts")
+    parser.add_argument('spreadfile', nargs='?', help="Spread csv file from gen_spreads.py")
+    parser.add_argument('outputfile', nargs='?', help="Word list of the viable pairs, to be given to the classifier scripts")
+    parser.add_argument('--batch', metavar='SPREAD_DIR', help="Filter every *_spread.csv in this directory, writing a *_viable.txt word list for each category to --output-dir")
+    parser.add_argument('--output-dir', default='Viable pairs', help="Where the word lists are written in batch mode")
+    parser.add_argument('--min-count', type=int, default=10, help="Skip pairs where the less frequent candidate appears fewer times than this. The default is the number of cross validation folds")
+    parser.add_argument('--status', nargs='+', choices=['identical', 'disjoint', 'neither'], default=['identical', 'disjoint', 'neither'], help="Only keep pairs with one of these grammatical statuses")
+    parser.add_argument('--report', default='skipped_pairs.csv', help="Csv file listing the skipped pairs and why they were skipped")
+    args = parser.parse_args()
+
+    if args.batch:
+        spreads = sorted(glob.glob(os.path.join(args.batch, '*_spread.csv')))
+        os.makedirs(args.output_dir, exist_ok=True)
+        jobs = [(x, os.path.join(args.output_dir, os.path.basename(x)[:-len('_spread.csv')] + '_viable.txt')) for x in spreads]
+    elif args.outputfile is not None:
+        jobs = [(args.spreadfile, args.outputfile)]
+    else:
+        parser.error("either give a spread and an output file or a spread directory with --batch")
+
+    report = []
+    for spreadfile, outputfile in jobs:
+        category = os.path.basename(spreadfile)[:-len('.csv')]
+        if category.endswith('_spread'):
+            category = category[:-len('_spread')]
+        viable, skipped = filter_pairs(read_spread(spreadfile), args.min_count, args.status)
+        write_pairs(viable, outputfile)
+        report.extend((category,) + x for x in skipped)
+        print("{}: {} viable, {} skipped".format(category, len(viable), len(skipped)))
+    write_report(report, args.report)